@@ -6,10 +6,25 @@ Backtesting engine for evaluating trading strategies.
 # CSV columns: time,open,high,low,close,volume
 
 from __future__ import annotations
-import csv, math, os
+import functools, itertools, math, os
 from dataclasses import dataclass
 from typing import Dict, List, Iterable
 
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit, prange
+    _NUMBA_AVAILABLE = True
+except Exception:  # numba is optional; the kernels then run as plain Python
+    _NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*_args, **_kwargs):
+        def _wrap(fn):
+            return fn
+        return _wrap
+
 BAR_DIR = os.getenv("BAR_DIR", "data/bars")
 
 @dataclass
@@ -21,28 +36,98 @@ class Bar:
     c: float
     v: float
 
-def load_bars_csv(symbol: str, ktype: str) -> List[Bar]:
-    sym = symbol if "." not in symbol else symbol.split(".", 1)[1]
-    path = os.path.join(BAR_DIR, f"{sym.upper()}_{ktype}.csv")
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Bars file not found: {path}")
-    out: List[Bar] = []
-    with open(path, "r", newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            out.append(Bar(
-                ts=str(row["time"]),
-                o=float(row["open"]),
-                h=float(row["high"]),
-                l=float(row["low"]),
-                c=float(row["close"]),
-                v=float(row.get("volume", 0) or 0),
-            ))
-    if not out:
+class BarList(list):
+    """List[Bar] that also carries contiguous open/close columns for the numeric kernels."""
+    opens: np.ndarray
+    closes: np.ndarray
+
+    def __init__(self, bars: Iterable[Bar] = ()) -> None:
+        super().__init__(bars)
+        self.opens = np.ascontiguousarray([b.o for b in self], dtype=np.float64)
+        self.closes = np.ascontiguousarray([b.c for b in self], dtype=np.float64)
+
+def _bar_columns(bars: List[Bar]):
+    if isinstance(bars, BarList):
+        return bars.opens, bars.closes
+    return (np.ascontiguousarray([b.o for b in bars], dtype=np.float64),
+            np.ascontiguousarray([b.c for b in bars], dtype=np.float64))
+
+def _bars_from_columns(ts, o, h, l, c, v) -> BarList:
+    return BarList(Bar(*row) for row in zip(ts, o, h, l, c, v))
+
+_CSV_COLS = frozenset(("time", "open", "high", "low", "close", "volume"))
+
+def _parse_bars_csv(path: str) -> BarList:
+    # C parser over a memory-mapped file; round_trip parsing gives the same floats as float()
+    df = None
+    if os.path.getsize(path):  # mmap rejects a zero-byte file
+        try:
+            df = pd.read_csv(
+                path, memory_map=True, engine="c", usecols=lambda col: col in _CSV_COLS,
+                dtype={"time": str}, keep_default_na=False, float_precision="round_trip",
+            )
+        except pd.errors.EmptyDataError:
+            pass
+    if df is None or df.empty:
         raise RuntimeError(f"No rows in {path}")
+    # an empty price cell leaves its column as text and fails the float conversion
+    o, h, l, c = (df[k].to_numpy(dtype=np.float64) for k in ("open", "high", "low", "close"))
+    if "volume" in df:
+        v = df["volume"].replace("", 0).fillna(0).to_numpy(dtype=np.float64)
+    else:
+        v = np.zeros(len(df))
+    out = [Bar(*row) for row in zip(
+        df["time"].tolist(), o.tolist(), h.tolist(), l.tolist(), c.tolist(), v.tolist(),
+    )]
     # Ensure ascending time (fixes entry_ts <= exit_ts)
     out.sort(key=lambda b: b.ts)
-    return out
+    return BarList(out)
+
+def _write_bars_npz(npz_path: str, bars: BarList) -> None:
+    tmp = npz_path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                ts=np.array([b.ts for b in bars]),
+                o=bars.opens, h=np.array([b.h for b in bars], dtype=np.float64),
+                l=np.array([b.l for b in bars], dtype=np.float64), c=bars.closes,
+                v=np.array([b.v for b in bars], dtype=np.float64),
+            )
+        os.replace(tmp, npz_path)
+    except OSError:
+        pass  # read-only data dir etc.; the cache is only an optimization
+
+@functools.lru_cache(maxsize=64)
+def _load_bars(path: str, mtime_ns: int) -> BarList:
+    # mtime_ns is part of the key so an edited CSV is reparsed
+    npz_path = os.path.splitext(path)[0] + ".npz"
+    try:
+        if os.stat(npz_path).st_mtime_ns >= mtime_ns:
+            with np.load(npz_path, allow_pickle=False) as z:
+                return _bars_from_columns(
+                    z["ts"].tolist(), z["o"].tolist(), z["h"].tolist(),
+                    z["l"].tolist(), z["c"].tolist(), z["v"].tolist(),
+                )
+    except (OSError, ValueError, KeyError):
+        pass  # missing or unreadable sibling; fall back to the CSV
+    bars = _parse_bars_csv(path)
+    _write_bars_npz(npz_path, bars)
+    return bars
+
+def load_bars_csv(symbol: str, ktype: str) -> BarList:
+    """
+    Bars from data/bars/{SYMBOL}_{KTYPE}.csv, sorted by time.
+    Parsed bars are kept in memory per (path, mtime) and in a {SYMBOL}_{KTYPE}.npz
+    sibling so a restart skips the CSV parse. Treat the result as read-only.
+    """
+    sym = symbol if "." not in symbol else symbol.split(".", 1)[1]
+    path = os.path.join(BAR_DIR, f"{sym.upper()}_{ktype}.csv")
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        raise FileNotFoundError(f"Bars file not found: {path}")
+    return _load_bars(path, mtime_ns)
 
 def sma(seq: Iterable[float]) -> float:
     seq = list(seq)
@@ -63,84 +148,106 @@ class BTResult:
     metrics: Dict[str, float]
     trades: List[Trade]
 
-def run_ma_crossover(
-    bars: List[Bar],
-    fast: int,
-    slow: int,
-    qty: float = 1.0,
-    size_mode: str = "shares",      # 'shares' | 'usd'
-    dollar_size: float = 0.0,
-    stop_loss_pct: float = 0.0,
-    take_profit_pct: float = 0.0,
-    commission_per_share: float = 0.0,
-    slippage_bps: float = 0.0,      # bps applied on entry + exit
-) -> BTResult:
-    if slow <= fast:
-        raise ValueError("slow must be > fast")
-    closes = [b.c for b in bars]
+@njit(cache=True)
+def _prefix_sums(closes):
+    # csum[i] = closes[0] + ... + closes[i-1]; any window sum is then one subtraction
+    n = len(closes)
+    csum = np.empty(n + 1, dtype=np.float64)
+    csum[0] = 0.0
+    total = 0.0
+    for i in range(n):
+        total += closes[i]
+        csum[i + 1] = total
+    return csum
+
+@njit(cache=True)
+def _window_mean(csum, lo: int, hi: int) -> float:
+    # mean of closes[max(0, lo):hi], 0.0 when empty (same as sma() on the slice)
+    if lo < 0:
+        lo = 0
+    if hi <= lo:
+        return 0.0
+    return (csum[hi] - csum[lo]) / (hi - lo)
+
+if not _NUMBA_AVAILABLE:
+    def _prefix_sums(closes):  # noqa: F811 - list in, list out for the pure-Python path
+        return [0.0, *itertools.accumulate(closes)]
+
+@njit(cache=True)
+def _ma_kernel(opens, closes, csum, fast, slow, qty, usd_sizing, dollar_size,
+               stop_loss_pct, take_profit_pct, commission_per_share, slip_mult, record=True):
+    """
+    Per-bar MA-crossover state machine over open/close columns; csum is _prefix_sums(closes).
+
+    Returns (entry_idx, exit_idx, entry_px, exit_px, qty, pnl, n_trades, wins, gross_pnl, max_dd);
+    timestamps are bar indices, resolved by the caller. With record=False the per-trade
+    arrays are left empty and only the counters are kept (grid sweeps).
+    """
+    n = len(closes)
+    cap = n + 1 if record else 0
+    entry_idx = np.empty(cap, dtype=np.int64)
+    exit_idx = np.empty(cap, dtype=np.int64)
+    entry_pxs = np.empty(cap, dtype=np.float64)
+    exit_pxs = np.empty(cap, dtype=np.float64)
+    qtys = np.empty(cap, dtype=np.float64)
+    pnls = np.empty(cap, dtype=np.float64)
+    k = 0
+    wins = 0
+    gross = 0.0
 
     pos_qty = 0.0
     avg_cost = 0.0
-    entry_ts = ""          # real entry timestamp (next bar)
+    entry_i = 0
     entry_px_mem = 0.0
 
-    trades: List[Trade] = []
     equity = 0.0
     peak_equity = 0.0
     max_dd = 0.0
-    wins = 0
-    losses = 0
 
-    def slip(px: float) -> float:
-        return px * (1.0 + (slippage_bps/1e4))
-
-    for i in range(1, len(bars)):  # start at 1 to have a previous window
-        # SMAs up to current bar i
-        fast_prev = sma(closes[max(0, i-fast-1): i])
-        slow_prev = sma(closes[max(0, i-slow-1): i])
-        fast_now  = sma(closes[max(0, i-fast+1): i+1])
-        slow_now  = sma(closes[max(0, i-slow+1): i+1])
+    for i in range(1, n):  # start at 1 to have a previous window
+        # SMAs up to current bar i, O(1) each from the prefix sums
+        fast_prev = _window_mean(csum, i - fast - 1, i)
+        slow_prev = _window_mean(csum, i - slow - 1, i)
+        fast_now = _window_mean(csum, i - fast + 1, i + 1)
+        slow_now = _window_mean(csum, i - slow + 1, i + 1)
 
         # Next-bar fill semantics
-        has_next = (i + 1 < len(bars))
-        next_ts = bars[i+1].ts if has_next else bars[i].ts
-        next_open = bars[i+1].o if has_next else bars[i].c  # fallback
+        if i + 1 < n:
+            next_i = i + 1
+            next_open = opens[i + 1]
+        else:
+            next_i = i
+            next_open = closes[i]  # fallback
 
         # --- exits first (if in position) ---
         if pos_qty > 0:
-            if take_profit_pct > 0 and bars[i].c >= avg_cost * (1.0 + take_profit_pct):
-                exit_px = slip(next_open)
-                pnl = (exit_px - avg_cost) * pos_qty - commission_per_share*pos_qty
-                trades.append(Trade(entry_ts, next_ts, "LONG", entry_px_mem, exit_px, pos_qty, pnl))
-                equity += pnl
-                pos_qty = 0.0; avg_cost = 0.0; entry_ts = ""; entry_px_mem = 0.0
-            elif stop_loss_pct > 0 and bars[i].c <= avg_cost * (1.0 - stop_loss_pct):
-                exit_px = slip(next_open)
-                pnl = (exit_px - avg_cost) * pos_qty - commission_per_share*pos_qty
-                trades.append(Trade(entry_ts, next_ts, "LONG", entry_px_mem, exit_px, pos_qty, pnl))
+            if ((take_profit_pct > 0 and closes[i] >= avg_cost * (1.0 + take_profit_pct))
+                    or (stop_loss_pct > 0 and closes[i] <= avg_cost * (1.0 - stop_loss_pct))
+                    or (fast_prev >= slow_prev and fast_now < slow_now)):
+                exit_px = next_open * slip_mult
+                pnl = (exit_px - avg_cost) * pos_qty - commission_per_share * pos_qty
+                if record:
+                    entry_idx[k] = entry_i; exit_idx[k] = next_i
+                    entry_pxs[k] = entry_px_mem; exit_pxs[k] = exit_px
+                    qtys[k] = pos_qty; pnls[k] = pnl
+                k += 1
+                if pnl >= 0:
+                    wins += 1
+                gross += pnl
                 equity += pnl
-                pos_qty = 0.0; avg_cost = 0.0; entry_ts = ""; entry_px_mem = 0.0
-            elif fast_prev >= slow_prev and fast_now < slow_now:
-                exit_px = slip(next_open)
-                pnl = (exit_px - avg_cost) * pos_qty - commission_per_share*pos_qty
-                trades.append(Trade(entry_ts, next_ts, "LONG", entry_px_mem, exit_px, pos_qty, pnl))
-                equity += pnl
-                pos_qty = 0.0; avg_cost = 0.0; entry_ts = ""; entry_px_mem = 0.0
+                pos_qty = 0.0; avg_cost = 0.0; entry_i = 0; entry_px_mem = 0.0
 
         # --- entry if flat and cross-up ---
         if pos_qty == 0 and fast_prev <= slow_prev and fast_now > slow_now:
-            fill_px = slip(next_open)
-            actual_qty = qty
-            if size_mode.lower() == "usd" and dollar_size > 0 and fill_px > 0:
+            fill_px = next_open * slip_mult
+            if usd_sizing and dollar_size > 0 and fill_px > 0:
                 actual_qty = math.floor(dollar_size / fill_px)
-                if actual_qty < 1:
-                    pass  # too small; skip
-                else:
-                    pos_qty = actual_qty; avg_cost = fill_px; entry_ts = next_ts; entry_px_mem = fill_px
-                    equity -= commission_per_share*pos_qty
+                if actual_qty >= 1:  # too small otherwise; skip
+                    pos_qty = actual_qty; avg_cost = fill_px; entry_i = next_i; entry_px_mem = fill_px
+                    equity -= commission_per_share * pos_qty
             else:
-                pos_qty = actual_qty; avg_cost = fill_px; entry_ts = next_ts; entry_px_mem = fill_px
-                equity -= commission_per_share*pos_qty
+                pos_qty = qty; avg_cost = fill_px; entry_i = next_i; entry_px_mem = fill_px
+                equity -= commission_per_share * pos_qty
 
         # drawdown update
         peak_equity = max(peak_equity, equity)
@@ -148,12 +255,79 @@ def run_ma_crossover(
 
     # close at last bar if still open
     if pos_qty > 0:
-        exit_ts = bars[-1].ts
-        exit_px = slip(bars[-1].c)
-        pnl = (exit_px - avg_cost) * pos_qty - commission_per_share*pos_qty
-        trades.append(Trade(entry_ts or bars[-1].ts, exit_ts, "LONG", entry_px_mem or avg_cost, exit_px, pos_qty, pnl))
-        equity += pnl
+        exit_px = closes[n - 1] * slip_mult
+        pnl = (exit_px - avg_cost) * pos_qty - commission_per_share * pos_qty
+        if record:
+            entry_idx[k] = entry_i; exit_idx[k] = n - 1
+            entry_pxs[k] = entry_px_mem; exit_pxs[k] = exit_px
+            qtys[k] = pos_qty; pnls[k] = pnl
+        k += 1
+        if pnl >= 0:
+            wins += 1
+        gross += pnl
+
+    return entry_idx, exit_idx, entry_pxs, exit_pxs, qtys, pnls, k, wins, gross, max_dd
+
+@njit(cache=True, parallel=True, nogil=True)
+def _ma_grid_kernel(opens, closes, fasts, slows, qty, usd_sizing, dollar_size,
+                    stop_loss_pct, take_profit_pct, commission_per_share, slip_mult):
+    """
+    Run _ma_kernel (counters only, no trade arrays) for every (fasts[j], slows[j]) pair,
+    spread across cores.
+
+    Returns an (n, 4) array of [trades, wins, gross_pnl, max_drawdown] per pair.
+    """
+    n = len(fasts)
+    out = np.zeros((n, 4), dtype=np.float64)
+    csum = _prefix_sums(closes)  # every window of every pair reads the same prefix sums
+    for j in prange(n):
+        res = _ma_kernel(opens, closes, csum, fasts[j], slows[j], qty, usd_sizing, dollar_size,
+                         stop_loss_pct, take_profit_pct, commission_per_share, slip_mult, False)
+        out[j, 0] = res[6]
+        out[j, 1] = res[7]
+        out[j, 2] = res[8]
+        out[j, 3] = res[9]
+    return out
+
+def run_ma_crossover(
+    bars: List[Bar],
+    fast: int,
+    slow: int,
+    qty: float = 1.0,
+    size_mode: str = "shares",      # 'shares' | 'usd'
+    dollar_size: float = 0.0,
+    stop_loss_pct: float = 0.0,
+    take_profit_pct: float = 0.0,
+    commission_per_share: float = 0.0,
+    slippage_bps: float = 0.0,      # bps applied on entry + exit
+) -> BTResult:
+    if slow <= fast:
+        raise ValueError("slow must be > fast")
+    opens, closes = _bar_columns(bars)
+    if not _NUMBA_AVAILABLE:
+        # plain-Python kernel: list indexing beats numpy scalar indexing
+        opens, closes = opens.tolist(), closes.tolist()
+    usd_sizing = size_mode.lower() == "usd"
+    # the kernel floor-sizes (whole shares) only when a dollar size is given; otherwise
+    # it trades qty as-is, fractional or not
+    floor_sized = usd_sizing and dollar_size > 0
 
+    entry_idx, exit_idx, entry_pxs, exit_pxs, qtys, pnls, k, _wins, _gross, max_dd = _ma_kernel(
+        opens, closes, _prefix_sums(closes), int(fast), int(slow), float(qty), usd_sizing, float(dollar_size),
+        float(stop_loss_pct), float(take_profit_pct), float(commission_per_share),
+        1.0 + (slippage_bps/1e4),
+    )
+
+    trades: List[Trade] = [
+        Trade(bars[ei].ts, bars[xi].ts, "LONG", epx, xpx, int(q) if floor_sized and epx > 0 else q, pnl)
+        for ei, xi, epx, xpx, q, pnl in zip(
+            entry_idx[:k].tolist(), exit_idx[:k].tolist(), entry_pxs[:k].tolist(),
+            exit_pxs[:k].tolist(), qtys[:k].tolist(), pnls[:k].tolist(),
+        )
+    ]
+
+    wins = 0
+    losses = 0
     for t in trades:
         if t.pnl >= 0: wins += 1
         else: losses += 1
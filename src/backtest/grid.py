@@ -1,7 +1,16 @@
 # Grid search for MA-crossover on preloaded bars.
 from __future__ import annotations
+import threading
 from typing import List, Dict
-from .engine import run_ma_crossover
+
+import numpy as np
+
+from .engine import _NUMBA_AVAILABLE, _bar_columns, _ma_grid_kernel
+
+# one sweep at a time: the kernel already fans out over every core, so concurrent sweeps
+# only contend for the same cores, and under the workqueue layer (the fallback when OpenMP
+# is unavailable) a second concurrent launch aborts the process
+_GRID_LOCK = threading.Lock()
 
 def run_ma_grid(
     bars,
@@ -16,27 +25,54 @@ def run_ma_grid(
     slippage_bps: float,
     top_n: int = 10,
 ) -> List[Dict]:
+    # every (fast, slow) combination, fast-major, keeping only slow > fast
+    fast_grid, slow_grid = np.meshgrid(
+        np.arange(int(fast_min), int(fast_max) + 1, int(fast_step), dtype=np.int64),
+        np.arange(int(slow_min), int(slow_max) + 1, int(slow_step), dtype=np.int64),
+        indexing="ij",
+    )
+    valid = slow_grid > fast_grid
+    fasts, slows = fast_grid[valid], slow_grid[valid]
+    if not len(fasts):
+        return []
+    opens, closes = _bar_columns(bars)
+    args = (
+        float(qty), size_mode.lower() == "usd", float(dollar_size),
+        float(stop_loss_pct), float(take_profit_pct), float(commission_per_share),
+        1.0 + (slippage_bps/1e4),
+    )
+    if _NUMBA_AVAILABLE:
+        # one kernel call for the whole sweep; pairs are evaluated in parallel by numba
+        with _GRID_LOCK:
+            stats = _ma_grid_kernel(opens, closes, fasts, slows, *args)
+    else:
+        # plain-Python kernel: list indexing beats numpy scalar indexing
+        stats = _ma_grid_kernel(opens.tolist(), closes.tolist(), fasts.tolist(), slows.tolist(), *args)
+
+    # rank by gross_pnl desc, then win_rate desc (ties keep grid order), and only
+    # build result dicts for the top N
+    trades, wins = stats[:, 0], stats[:, 1]
+    traded = trades > 0
+    gross = np.where(traded, stats[:, 2], 0.0)
+    win_rate = np.where(traded, wins / np.where(traded, trades, 1.0) * 100.0, 0.0)
+    top_n = max(1, int(top_n))
+    idx = np.arange(len(gross))
+    if top_n < len(idx):
+        # everything at or above the N-th best gross_pnl, ties included
+        idx = np.flatnonzero(gross >= np.partition(gross, -top_n)[-top_n])
+    order = idx[np.lexsort((-win_rate[idx], -gross[idx]))][:top_n]
+
     out: List[Dict] = []
-    for fast in range(int(fast_min), int(fast_max) + 1, int(fast_step)):
-        for slow in range(int(slow_min), int(slow_max) + 1, int(slow_step)):
-            if slow <= fast:
-                continue
-            res = run_ma_crossover(
-                bars=bars,
-                fast=fast,
-                slow=slow,
-                qty=qty,
-                size_mode=size_mode,
-                dollar_size=dollar_size,
-                stop_loss_pct=stop_loss_pct,
-                take_profit_pct=take_profit_pct,
-                commission_per_share=commission_per_share,
-                slippage_bps=slippage_bps,
-            )
-            out.append({
-                "fast": fast, "slow": slow,
-                **res.metrics
-            })
-    # sort by gross_pnl desc, then win_rate desc
-    out.sort(key=lambda d: (d.get("gross_pnl", 0.0), d.get("win_rate", 0.0)), reverse=True)
-    return out[:max(1, int(top_n))]
+    for j in order.tolist():
+        n, w, g, max_dd = stats[j].tolist()
+        out.append({
+            "fast": int(fasts[j]), "slow": int(slows[j]),
+            "trades": n,
+            "wins": w,
+            "losses": n - w,
+            "win_rate": (w/n)*100.0 if n else 0.0,
+            "gross_pnl": g if n else 0,
+            "avg_pnl": (g/n) if n else 0.0,
+            "max_drawdown": max_dd,
+        })
+    return out
@@ -10,15 +10,31 @@ from __future__ import annotations
 from typing import Dict, Any, List, Tuple
 import re
 
+import numpy as np
+
 # local client utils
 from core.moomoo_client import MoomooClient, _df_to_records
 
 # --- Moomoo (futu) ---
 
-def _normalize(symbol: str) -> str:
-    return symbol if "." in symbol else f"US.{symbol.upper()}"
+# symbol -> broker code; bounded by the (small, fixed) universe of traded symbols
+_norm_cache: Dict[str, str] = {}
 
-def _bars_from_futu(client: MoomooClient, symbol: str, ktype: str, n: int) -> List[Dict[str, Any]]:
+def _normalize(symbol: str) -> str:
+    code = _norm_cache.get(symbol)
+    if code is None:
+        code = _norm_cache[symbol] = symbol if "." in symbol else f"US.{symbol.upper()}"
+    return code
+
+def _close_column(df, name: str) -> np.ndarray:
+    """One price column as float64 (None/NaN stay NaN and fail any `> 0` filter)."""
+    col = df[name]
+    if getattr(col, "ndim", 1) > 1:  # yfinance may key columns by (field, ticker)
+        col = col.iloc[:, 0]
+    return col.to_numpy(dtype=np.float64, na_value=np.nan)
+
+def _futu_kline(client: MoomooClient, symbol: str, ktype: str, n: int):
+    """Raw get_cur_kline payload (DataFrame, or list on some builds)."""
     if not client.quote_ctx:
         raise RuntimeError("Quote context not available")
     code = _normalize(symbol)
@@ -31,15 +47,25 @@ def _bars_from_futu(client: MoomooClient, symbol: str, ktype: str, n: int) -> Li
     for kwargs in tried:
         try:
             ret, df = client.quote_ctx.get_cur_kline(**kwargs)  # type: ignore[arg-type]
-            if ret != 0:
-                raise RuntimeError(f"get_cur_kline failed: {df}")
-            recs = _df_to_records(df)
-            return recs[-n:] if isinstance(recs, list) else []
         except TypeError as e:
             last_err = e
             continue
+        if ret != 0:
+            raise RuntimeError(f"get_cur_kline failed: {df}")
+        return df
     raise RuntimeError(f"get_cur_kline incompatible with this futu build: {last_err}")
 
+def _bars_from_futu(client: MoomooClient, symbol: str, ktype: str, n: int) -> List[Dict[str, Any]]:
+    recs = _df_to_records(_futu_kline(client, symbol, ktype, n))
+    return recs[-n:] if isinstance(recs, list) else []
+
+def _closes_from_futu(client: MoomooClient, symbol: str, ktype: str, n: int) -> np.ndarray:
+    df = _futu_kline(client, symbol, ktype, n)
+    if hasattr(df, "columns"):
+        return _close_column(df, "close")[-n:]
+    recs = df if isinstance(df, list) else []
+    return np.array([float(r.get("close", 0) or 0) for r in recs[-n:]], dtype=np.float64)
+
 # --- Yahoo Finance fallback ---
 
 def _yf_interval(ktype: str) -> str:
@@ -59,7 +85,8 @@ def _symbol_for_yf(symbol: str) -> str:
     # US.AAPL -> AAPL
     return symbol.split(".")[-1]
 
-def _bars_from_yf(symbol: str, ktype: str, n: int) -> List[Dict[str, Any]]:
+def _yf_frame(symbol: str, ktype: str, n: int):
+    """Last n rows from yfinance, or None when it has nothing."""
     try:
         import yfinance as yf  # install at runtime if needed
     except Exception as e:
@@ -78,10 +105,15 @@ def _bars_from_yf(symbol: str, ktype: str, n: int) -> List[Dict[str, Any]]:
         threads=False,
     )
     if df is None or df.empty:
+        return None
+    return df.tail(n)
+
+def _bars_from_yf(symbol: str, ktype: str, n: int) -> List[Dict[str, Any]]:
+    df = _yf_frame(symbol, ktype, n)
+    if df is None:
         return []
 
     # Standardize to list[dict]
-    df = df.tail(n)
     out: List[Dict[str, Any]] = []
     for ts, row in df.iterrows():
         out.append({
@@ -115,3 +147,20 @@ def get_bars_safely(client: MoomooClient, symbol: str, ktype: str, n: int) -> Tu
             return bars, "yfinance"
         except Exception as e2:
             raise RuntimeError(f"both data providers failed; futu: {msg}; yfinance: {e2}") from e2
+
+def get_closes_safely(client: MoomooClient, symbol: str, ktype: str, n: int) -> Tuple[np.ndarray, str]:
+    """
+    Return (closes, source) like get_bars_safely, but only the close column as a float64
+    array, taken straight from the provider's DataFrame without building per-bar dicts.
+    """
+    try:
+        return _closes_from_futu(client, symbol, ktype, n), "futu"
+    except Exception as e:
+        msg = str(e)
+        try:
+            df = _yf_frame(symbol, ktype, n)
+            if df is None:
+                raise RuntimeError("yfinance returned no data")
+            return _close_column(df, "Close"), "yfinance"
+        except Exception as e2:
+            raise RuntimeError(f"both data providers failed; futu: {msg}; yfinance: {e2}") from e2
@@ -5,7 +5,7 @@ This module provides high-level methods for logging in, retrieving account info,
 and placing orders. It interacts with the OpenD session and Futu API via our wrapper.
 """
 
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any
 import os
 import pandas as pd
 
@@ -34,6 +34,16 @@ def _df_to_records(df) -> List[Dict[str, Any]]:
     return df if isinstance(df, list) else []
 
 
+def _iter_df_records(df) -> Iterator[Dict[str, Any]]:
+    """Yield a Futu DataFrame (or list) row by row without materializing every record."""
+    if isinstance(df, pd.DataFrame):
+        cols = list(df.columns)
+        for row in df.itertuples(index=False, name=None):
+            yield dict(zip(cols, row))
+    elif isinstance(df, list):
+        yield from df
+
+
 # ---------------- client ---------------- #
 
 class MoomooClient:
@@ -154,7 +164,7 @@ class MoomooClient:
 
     # -------- read data -------- #
 
-    def get_positions(self) -> List[Dict[str, Any]]:
+    def _positions_frame(self):
         if not self.connected:
             raise RuntimeError("Not connected")
         if not self.account_id:
@@ -172,13 +182,20 @@ class MoomooClient:
                 ret, df = self.trading_ctx.position_list_query(**kwargs)  # type: ignore[arg-type]
                 if ret != RET_OK:
                     raise RuntimeError(f"position_list_query failed: {df}")
-                return _df_to_records(df)
+                return df
             except TypeError as e:
                 last_err = e
                 continue
         raise RuntimeError(f"position_list_query incompatible with this futu build: {last_err}")
 
-    def get_orders(self) -> List[Dict[str, Any]]:
+    def get_positions(self) -> List[Dict[str, Any]]:
+        return _df_to_records(self._positions_frame())
+
+    def iter_positions(self) -> Iterator[Dict[str, Any]]:
+        """Like get_positions, but yields rows lazily. The broker query runs eagerly, so errors raise here."""
+        return _iter_df_records(self._positions_frame())
+
+    def _orders_frame(self):
         if not self.connected:
             raise RuntimeError("Not connected")
         if not self.account_id:
@@ -196,12 +213,19 @@ class MoomooClient:
                 ret, df = self.trading_ctx.order_list_query(**kwargs)  # type: ignore[arg-type]
                 if ret != RET_OK:
                     raise RuntimeError(f"order_list_query failed: {df}")
-                return _df_to_records(df)
+                return df
             except TypeError as e:
                 last_err = e
                 continue
         raise RuntimeError(f"order_list_query incompatible with this futu build: {last_err}")
 
+    def get_orders(self) -> List[Dict[str, Any]]:
+        return _df_to_records(self._orders_frame())
+
+    def iter_orders(self) -> Iterator[Dict[str, Any]]:
+        """Like get_orders, but yields rows lazily. The broker query runs eagerly, so errors raise here."""
+        return _iter_df_records(self._orders_frame())
+
     def get_order(self, order_id: str | int) -> Dict[str, Any]:
         if not self.connected:
             raise RuntimeError("Not connected")
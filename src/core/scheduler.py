@@ -3,7 +3,7 @@
 import asyncio
 import time
 from typing import Dict, Callable, Any, Optional
-from core.storage import list_strategies, insert_run
+from core.storage import list_strategies, insert_run, run_batch
 from core.moomoo_client import MoomooClient
 
 StrategyStep = Callable[[int, MoomooClient, str, Dict[str, Any]], None]
@@ -14,6 +14,10 @@ class TraderScheduler:
         self._running = False
         self._task: Optional[asyncio.Task] = None
         self._registry: Dict[str, StrategyStep] = {}
+        # strategy id -> monotonic time of its next step
+        self._next_due: Dict[int, float] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
 
     def register(self, name: str, step_fn: StrategyStep) -> None:
         self._registry[name] = step_fn
@@ -22,29 +26,45 @@ class TraderScheduler:
         if self._running:
             return
         self._running = True
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
         self._task = asyncio.create_task(self._run_loop())
 
+    def notify(self) -> None:
+        """Wake the loop early (e.g. a strategy was just started). Safe from any thread."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
     async def _run_loop(self) -> None:
         while self._running:
             try:
                 await self._tick_all()
             except Exception as e:
                 print("Scheduler tick error:", e)
-            await asyncio.sleep(1.0)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
 
     async def _tick_all(self) -> None:
         client = self._get_client()
         if client is None or not client.connected:
             return
-        now = time.time()
-        for s in list_strategies():
-            if not s["active"]:
-                continue
-            step_fn = self._registry.get(s["name"])
-            if not step_fn:
-                insert_run(s["id"], "ERROR", f"Strategy '{s['name']}' not registered")
-                continue
-            if int(now) % max(1, s["interval_sec"]) == 0:
+        now = time.monotonic()
+        # one commit for every run row written during this pass
+        with run_batch():
+            for s in list_strategies():
+                if not s["active"]:
+                    self._next_due.pop(s["id"], None)
+                    continue
+                step_fn = self._registry.get(s["name"])
+                if not step_fn:
+                    insert_run(s["id"], "ERROR", f"Strategy '{s['name']}' not registered")
+                    continue
+                if now < self._next_due.get(s["id"], 0.0):
+                    continue
+                self._next_due[s["id"]] = now + max(1, s["interval_sec"])
                 try:
                     step_fn(s["id"], client, s["symbol"], s["params"])
                 except Exception as e:
@@ -52,6 +72,8 @@ class TraderScheduler:
 
     async def stop(self) -> None:
         self._running = False
+        if self._wake is not None:
+            self._wake.set()
         if self._task:
             try:
                 await asyncio.wait_for(self._task, timeout=2.0)
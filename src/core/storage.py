@@ -3,10 +3,24 @@
 import json
 import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, Optional, List, Tuple
+from typing import Any, Dict, Iterator, Optional, List, Tuple
 from datetime import datetime, timezone, date
 
+try:
+    import orjson
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    _loads = orjson.loads
+except ImportError:  # stdlib fallback; stored text stays compatible either way
+    _dumps = json.dumps
+    _loads = json.loads
+
 DB_PATH = Path(os.getenv("TRADER_DB", "data/trader.db"))
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
@@ -104,7 +118,7 @@ def insert_strategy(name: str, symbol: str, params: Dict[str, Any], interval_sec
     with _conn() as c:
         cur = c.execute(
             "INSERT INTO strategies (name, symbol, params_json, interval_sec, active) VALUES (?,?,?,?,1)",
-            (name, symbol, json.dumps(params), interval_sec),
+            (name, symbol, _dumps(params), interval_sec),
         )
         return cur.lastrowid
 
@@ -124,13 +138,31 @@ def get_strategy(strategy_id: int) -> Optional[Dict[str, Any]]:
             "id": row["id"],
             "name": row["name"],
             "symbol": row["symbol"],
-            "params": json.loads(row["params_json"]),
+            "params": _loads(row["params_json"]),
             "active": bool(row["active"]),
             "interval_sec": int(row["interval_sec"]),
             "created_at": row["created_at"],
         }
 
 
+# strategy id -> monotonic expiry of a positive "exists" answer. Only hits are cached:
+# strategies are never deleted, so a cached hit can't go stale, and a new id is never masked.
+_STRATEGY_EXISTS_TTL_SEC = 1.0
+_strategy_seen: Dict[int, float] = {}
+
+
+def strategy_exists(strategy_id: int) -> bool:
+    """Cheap 404 check for the automation endpoints (SELECT 1, no params decode)."""
+    now = time.monotonic()
+    if _strategy_seen.get(strategy_id, 0.0) > now:
+        return True
+    with _conn() as c:
+        found = c.execute("SELECT 1 FROM strategies WHERE id=?", (strategy_id,)).fetchone() is not None
+    if found:
+        _strategy_seen[strategy_id] = now + _STRATEGY_EXISTS_TTL_SEC
+    return found
+
+
 def list_strategies() -> List[Dict[str, Any]]:
     with _conn() as c:
         cur = c.execute("SELECT * FROM strategies ORDER BY id DESC")
@@ -141,7 +173,7 @@ def list_strategies() -> List[Dict[str, Any]]:
                 "id": r["id"],
                 "name": r["name"],
                 "symbol": r["symbol"],
-                "params": json.loads(r["params_json"]),
+                "params": _loads(r["params_json"]),
                 "active": bool(r["active"]),
                 "interval_sec": int(r["interval_sec"]),
                 "created_at": r["created_at"],
@@ -149,7 +181,36 @@ def list_strategies() -> List[Dict[str, Any]]:
         return out
 
 
+# Per-thread buffer of pending run rows while inside run_batch()
+_run_batch = threading.local()
+
+
+@contextmanager
+def run_batch() -> Iterator[None]:
+    """Buffer insert_run() calls made on this thread and commit them in one transaction."""
+    if getattr(_run_batch, "rows", None) is not None:
+        yield  # nested: the outermost batch flushes
+        return
+    _run_batch.rows = []
+    try:
+        yield
+    finally:
+        rows, _run_batch.rows = _run_batch.rows, None
+        if rows:
+            with _conn() as c:
+                c.executemany(
+                    "INSERT INTO runs (strategy_id, ts, status, message) VALUES (?,?,?,?)",
+                    rows,
+                )
+
+
 def insert_run(strategy_id: int, status: str, message: str = "") -> None:
+    rows = getattr(_run_batch, "rows", None)
+    if rows is not None:
+        # keep the time of the event, not of the flush
+        ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        rows.append((strategy_id, ts, status, message))
+        return
     with _conn() as c:
         c.execute(
             "INSERT INTO runs (strategy_id, status, message) VALUES (?,?,?)",
@@ -188,7 +249,7 @@ def update_strategy(
 
     if params is not None:
         sets.append("params_json=?")
-        vals.append(json.dumps(new_params))
+        vals.append(_dumps(new_params))
 
     if interval_sec is not None:
         sets.append("interval_sec=?")
@@ -218,7 +279,7 @@ def get_setting(key: str) -> Optional[str]:
 def set_setting(key: str, value: Any) -> None:
     with _conn() as c:
         c.execute("INSERT INTO settings(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
-                  (key, json.dumps(value) if not isinstance(value, str) else value))
+                  (key, _dumps(value) if not isinstance(value, str) else value))
 
 def all_settings() -> Dict[str, Any]:
     with _conn() as c:
@@ -226,7 +287,7 @@ def all_settings() -> Dict[str, Any]:
         out = {}
         for r in cur.fetchall():
             try:
-                out[r["key"]] = json.loads(r["value"])
+                out[r["key"]] = _loads(r["value"])
             except Exception:
                 out[r["key"]] = r["value"]
         return out
@@ -278,6 +339,30 @@ def record_fill(
         )
 
 
+def record_fills_bulk(rows: List[Tuple[Optional[str], str, str, float, float, str]]) -> None:
+    """
+    record_fill for many rows in one transaction.
+    rows: (broker_order_id, symbol, side, qty, price, ts_str). Same de-dup rule,
+    which also catches repeats within the batch.
+    """
+    params = []
+    for broker_order_id, symbol, side, qty, price, ts_str in rows:
+        oid = str(broker_order_id) if broker_order_id else None
+        params.append((oid, symbol, side, float(qty), float(price), ts_str, oid, ts_str, float(qty)))
+    if not params:
+        return
+    with _conn() as c:
+        c.executemany(
+            """INSERT INTO fills
+               (broker_order_id, symbol, side, qty, price, ts)
+               SELECT ?,?,?,?,?,?
+               WHERE NOT EXISTS (
+                   SELECT 1 FROM fills WHERE broker_order_id=? AND ts=? AND ABS(qty-?)<1e-9
+               )""",
+            params,
+        )
+
+
 # ----- NEW: Action log helpers -----
 
 def insert_action_log(
@@ -300,7 +385,28 @@ def insert_action_log(
              (float(qty) if qty is not None else None),
              (float(price) if price is not None else None),
              reason, status,
-             (json.dumps(extra) if extra is not None else None))
+             (_dumps(extra) if extra is not None else None))
+        )
+
+def insert_action_logs_bulk(rows: List[Tuple[Any, ...]]) -> None:
+    """
+    Write queued action log entries in one transaction.
+    rows: (ts_utc_str, mode, action, symbol, side, qty, price, reason, status, extra)
+    """
+    if not rows:
+        return
+    with _conn() as c:
+        c.executemany(
+            """INSERT INTO action_log(ts, mode, action, symbol, side, qty, price, reason, status, extra_json)
+               VALUES(?,?,?,?,?,?,?,?,?,?)""",
+            [
+                (ts, mode, action, symbol, side,
+                 (float(qty) if qty is not None else None),
+                 (float(price) if price is not None else None),
+                 reason, status,
+                 (_dumps(extra) if extra is not None else None))
+                for ts, mode, action, symbol, side, qty, price, reason, status, extra in rows
+            ],
         )
 
 def list_action_logs(
@@ -328,13 +434,24 @@ def list_action_logs(
 
 # ----- PnL (FIFO/avg-cost style, computed from fills) -----
 
-def _iter_fills_ordered() -> List[sqlite3.Row]:
-    with _conn() as c:
-        cur = c.execute("SELECT * FROM fills ORDER BY ts ASC, id ASC")
-        return cur.fetchall()
+def _iter_fills_ordered() -> Iterator[sqlite3.Row]:
+    # stream from the cursor; the fills table grows without bound
+    c = _conn()
+    try:
+        yield from c.execute("SELECT * FROM fills ORDER BY ts ASC, id ASC")
+    finally:
+        c.close()
 
 
 def pnl_history(days: int = 7) -> List[Dict[str, Any]]:
+    return list(iter_pnl_history(days))
+
+
+def iter_pnl_history(days: int = 7) -> Iterator[Dict[str, Any]]:
+    """
+    Same rows as pnl_history, yielded lazily. The fill walk runs when this is
+    called (so errors raise here); only the per-day rows are produced lazily.
+    """
     # Walk all fills to compute realized PnL by calendar day.
     # Maintains per-symbol position & avg cost across the whole history.
     from collections import defaultdict
@@ -365,7 +482,7 @@ def pnl_history(days: int = 7) -> List[Dict[str, Any]]:
 
     # return last N days (if available) sorted asc by date
     items = sorted(realized_by_day.items(), key=lambda x: x[0])[-int(days):]
-    return [{"date": k, "realized_pnl": float(v)} for k, v in items]
+    return ({"date": k, "realized_pnl": float(v)} for k, v in items)
 
 
 def pnl_today() -> Dict[str, Any]:
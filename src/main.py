@@ -5,11 +5,13 @@ This module exposes a FastAPI application that will serve as the API for control
 """
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 app = FastAPI(
     title="Moomoo ChatGPT Trader",
     description="Backend API for the ChatGPT-powered trading bot using the moomoo API.",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -6,13 +6,15 @@ Raises ValueError("reason") when a check fails; callers translate to HTTP 400 or
 
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from datetime import datetime, time, timedelta
 from pathlib import Path
-import json
-from typing import Optional, Sequence, Dict, Any
+from typing import Optional, Sequence, Dict, Any, Tuple
 
-from core.market_data import get_bars_safely
+import orjson
+
+from core.market_data import get_closes_safely
 
 
 _DEFAULT_CFG = {
@@ -26,19 +28,40 @@ _DEFAULT_CFG = {
 }
 
 
+# the file PUT /risk/config writes; the server imports this so both always agree
+RISK_PATH = Path(os.getenv("RISK_FILE", "data/risk.json"))
+
+# (st_mtime_ns, merged cfg); every order check loads the config, the file rarely changes
+_cfg_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+
+
+def _with_whitelist_set(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    # hashed copy of symbol_whitelist, built once per config load rather than per order
+    cfg["symbol_whitelist_set"] = frozenset(cfg.get("symbol_whitelist") or ())
+    return cfg
+
+
 def load_risk_cfg() -> Dict[str, Any]:
-    """Load risk config from data/risk.json with sensible defaults."""
-    p = Path("data/risk.json")
-    if p.exists():
-        try:
-            cfg = json.loads(p.read_text())
-            # merge defaults
-            m = _DEFAULT_CFG.copy()
-            m.update({k: v for k, v in cfg.items() if v is not None})
-            return m
-        except Exception:
-            pass
-    return _DEFAULT_CFG.copy()
+    """Load risk config from RISK_PATH (RISK_FILE, default data/risk.json) with sensible defaults.
+    Also carries symbol_whitelist_set, a frozenset of symbol_whitelist."""
+    global _cfg_cache
+    try:
+        mtime = RISK_PATH.stat().st_mtime_ns
+    except OSError:
+        return _with_whitelist_set(_DEFAULT_CFG.copy())
+    cached = _cfg_cache
+    if cached is not None and cached[0] == mtime:
+        return cached[1].copy()
+    try:
+        cfg = orjson.loads(RISK_PATH.read_bytes())
+        # merge defaults
+        m = _DEFAULT_CFG.copy()
+        m.update({k: v for k, v in cfg.items() if v is not None})
+        _with_whitelist_set(m)
+    except Exception:
+        return _with_whitelist_set(_DEFAULT_CFG.copy())
+    _cfg_cache = (mtime, m)
+    return m.copy()
 
 
 def _parse_hhmm(s: str) -> time:
@@ -77,10 +100,9 @@ def _estimate_price(client, symbol: str, order_type: str, price: Optional[float]
         return float(price or 0)
     # try last close via safe fallback (futu→yfinance)
     try:
-        bars, _src = get_bars_safely(client, symbol, "K_1M", 1)
-        if bars:
-            px = float(bars[-1].get("close", 0) or 0)
-            return px
+        closes, _src = get_closes_safely(client, symbol, "K_1M", 1)
+        if len(closes):
+            return float(closes[-1])
     except Exception:
         pass
     return 0.0
@@ -112,7 +134,7 @@ def enforce_order_limits(
     side_u = (side or "").upper()
 
     # Whitelist (only enforced for new buys)
-    wl = cfg.get("symbol_whitelist") or []
+    wl = cfg["symbol_whitelist_set"]
     if wl and side_u.startswith("BUY") and symbol not in wl:
         raise ValueError(f"{symbol} not in whitelist")
 
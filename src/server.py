@@ -1,19 +1,28 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+import msgspec
+import orjson
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import os
 import json
-from datetime import datetime
-from pathlib import Path
+import logging
+import threading
+import time
+from dataclasses import dataclass
 
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 # --- Internal modules ---
-from core.market_data import get_bars_safely
+from core.market_data import get_closes_safely
 from core.moomoo_client import MoomooClient
 from core.futu_client import TrdEnv
 from core.session import load_session, save_session, clear_session
-from risk.limits import enforce_order_limits
+from risk.limits import RISK_PATH, enforce_order_limits
 
 # Optional automation (scheduler + storage + strategy step)
 try:
@@ -22,13 +31,14 @@ try:
         insert_strategy,
         set_strategy_active,
         get_strategy,
+        strategy_exists,
         list_strategies,
         list_runs,
         update_strategy,
-        record_fill,
+        record_fills_bulk,
         pnl_today,
-        pnl_history,
-        insert_action_log,
+        iter_pnl_history,
+        insert_action_logs_bulk,
         list_action_logs,
         get_setting,
         set_setting,
@@ -42,6 +52,17 @@ except Exception as _e:
     TraderScheduler = None  # type: ignore[misc]
 
 # Backtest modules
+# The grid kernel runs on FastAPI's threadpool; once a parallel kernel has been launched
+# from a pool thread, TBB's workers keep this process from exiting, so the server prefers
+# OpenMP/workqueue (must be set before the first parallel launch; an explicit
+# NUMBA_THREADING_LAYER_PRIORITY in the environment wins).
+if "NUMBA_THREADING_LAYER_PRIORITY" not in os.environ:
+    try:
+        import numba
+        numba.config.THREADING_LAYER_PRIORITY = ["omp", "workqueue", "tbb"]
+    except ImportError:
+        pass
+
 try:
     from backtest.engine import load_bars_csv, run_ma_crossover
     _BACKTEST_AVAILABLE = True
@@ -59,9 +80,20 @@ except Exception as _ge:
     _GRID_IMPORT_ERR = _ge
 
 
+logger = logging.getLogger(__name__)
+
+
 # ---------- App + CORS ----------
 
-app = FastAPI(title="Moomoo ChatGPT Trader API")
+class _ORJSONResponse(ORJSONResponse):
+    """orjson that also takes numpy scalars/arrays and non-str dict keys, so handlers that
+    return this directly (skipping jsonable_encoder) can hand over kernel output as-is."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+# orjson for every dict/list a handler returns, not just the list-heavy routes
+app = FastAPI(title="Moomoo ChatGPT Trader API", default_response_class=_ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -71,19 +103,88 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large record listings (positions/orders/runs); small bodies pass through untouched.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 
 # ---------- Globals ----------
 
-# Global broker client instance; created on /connect
-client: Optional[MoomooClient] = None
+class ClientRegistry:
+    """
+    Holder for the process-wide broker client (created on /connect).
+    Reads are a plain slot load; connect/disconnect swap it under `lock`.
+    """
+    __slots__ = ("client", "lock")
+
+    def __init__(self) -> None:
+        self.client: Optional[MoomooClient] = None
+        self.lock = threading.RLock()
+
+    def set(self, c: Optional[MoomooClient]) -> None:
+        with self.lock:
+            self.client = c
+
+    def require_connected(self) -> MoomooClient:
+        """The connected client, or HTTP 400."""
+        c = self.client
+        if c is None or not c.connected:
+            raise HTTPException(status_code=400, detail="Not connected")
+        return c
+
+_clients = ClientRegistry()
 
 # Global scheduler (if automation imports are available)
-scheduler = None  # will hold TraderScheduler
+scheduler: Optional["TraderScheduler"] = None
+
+# Encoded /accounts/active body, keyed by (client, account_id, env) it was built from
+_accounts_active_cache: Optional[Tuple[MoomooClient, Optional[int], Any, bytes]] = None
+
+# Last seen open-positions count as (monotonic ts, client, account_id, count);
+# lets /risk/status skip a broker round-trip while it is fresh
+_last_pos_count: Optional[Tuple[float, MoomooClient, Optional[int], int]] = None
+_POS_COUNT_TTL_SEC = 5.0
+
+# Bot mode as stored in settings; loaded on first use, replaced by PUT /bot/mode
+_bot_mode: Optional[str] = None
+
+# Pending action_log rows. Handlers append (any thread); _action_log_flusher
+# writes them in batches so an order does not wait on a log commit.
+_action_log_buf: Deque[Tuple[Any, ...]] = deque()
+_action_log_loop: Optional[asyncio.AbstractEventLoop] = None
+_action_log_wake: Optional[asyncio.Event] = None
+_action_log_task: Optional[asyncio.Task] = None
+# set by the first append after a drain; at most one wake is scheduled per flush
+_action_log_wake_pending = False
+_ACTION_LOG_BATCH = 64
+_ACTION_LOG_LINGER_SEC = 0.05
+# ACTION_LOG_ENABLED=0 turns action logging off (_log_action checks it). Toggle at
+# runtime with PUT /logs/enable.
+_action_log_enabled = os.getenv("ACTION_LOG_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+# ---------- Connection defaults (.env) ----------
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """OpenD connection defaults, resolved once from the environment at startup."""
+    host: str
+    port: int
+    client_id: int
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            host=os.getenv("MOOMOO_HOST", "127.0.0.1"),
+            port=int(os.getenv("MOOMOO_PORT", "11111")),
+            client_id=int(os.getenv("MOOMOO_CLIENT_ID", "1")),
+        )
+
+_settings = Settings.from_env()
 
 
 # ---------- Risk config (local file) ----------
 
-RISK_PATH = Path(os.getenv("RISK_FILE", "data/risk.json"))
+# RISK_PATH comes from risk.limits, so order checks read the file this API writes
 _DEFAULT_RISK = {
     "enabled": True,
     "max_usd_per_trade": 1000.0,
@@ -94,43 +195,61 @@ _DEFAULT_RISK = {
     "flatten_before_close_min": 5,
 }
 
-def _risk_load() -> dict:
+# (st_mtime_ns, parsed cfg); the file is only re-read when its mtime moves
+_risk_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+
+def _risk_load() -> Dict[str, Any]:
+    global _risk_cache
     try:
-        if RISK_PATH.exists():
-            return json.loads(RISK_PATH.read_text())
-    except Exception:
+        mtime = RISK_PATH.stat().st_mtime_ns
+        cached = _risk_cache
+        if cached is None or cached[0] != mtime:
+            cached = _risk_cache = (mtime, orjson.loads(RISK_PATH.read_bytes()))
+        return dict(cached[1])
+    except (OSError, ValueError):
         pass
-    RISK_PATH.parent.mkdir(parents=True, exist_ok=True)
-    RISK_PATH.write_text(json.dumps(_DEFAULT_RISK, indent=2))
+    _risk_save(_DEFAULT_RISK)
     return dict(_DEFAULT_RISK)
 
-def _risk_save(cfg: dict) -> None:
+def _risk_save(cfg: Dict[str, Any]) -> None:
+    global _risk_cache
     RISK_PATH.parent.mkdir(parents=True, exist_ok=True)
-    RISK_PATH.write_text(json.dumps(cfg, indent=2))
+    # write-then-rename so a concurrent load never sees a truncated file
+    tmp = RISK_PATH.with_suffix(".json.tmp")
+    tmp.write_bytes(orjson.dumps(cfg, option=orjson.OPT_INDENT_2))
+    os.replace(tmp, RISK_PATH)
+    _risk_cache = (RISK_PATH.stat().st_mtime_ns, dict(cfg))
 
 
 # ---------- Request Models ----------
 
-class ConnectRequest(BaseModel):
+# Connection/account, backtest and risk bodies are msgspec Structs too (decoded by
+# _msgspec_body); only the strategy create/update bodies still use pydantic.
+
+class ConnectRequest(msgspec.Struct, frozen=True):
     host: Optional[str] = None
     port: Optional[int] = None
     client_id: Optional[int] = None  # parity only
 
-class SelectAccountRequest(BaseModel):
+class SelectAccountRequest(msgspec.Struct, frozen=True):
     account_id: str
     trd_env: str = "SIMULATE"  # "SIMULATE" or "REAL"
 
-class PlaceOrderRequest(BaseModel):
+# Order/quote bodies are hit at strategy-tick frequency, so they are msgspec
+# Structs decoded straight from the raw body (see _msgspec_body) rather than
+# going through pydantic validation.
+
+class PlaceOrderRequest(msgspec.Struct, frozen=True):
     symbol: str                 # e.g., "AAPL" or "US.AAPL"
     qty: float
     side: str                   # "BUY" or "SELL"
     order_type: str = "MARKET"  # "MARKET" or "LIMIT"
     price: Optional[float] = None
 
-class CancelOrderRequest(BaseModel):
+class CancelOrderRequest(msgspec.Struct, frozen=True):
     order_id: str
 
-class SubscribeQuotesRequest(BaseModel):
+class SubscribeQuotesRequest(msgspec.Struct, frozen=True):
     symbols: list[str]
 
 class StartMACrossoverRequest(BaseModel):
@@ -169,7 +288,11 @@ class UpdateStrategyRequest(BaseModel):
     interval_sec: Optional[int] = None
     active: Optional[bool] = None
 
-class BacktestMARequest(BaseModel):
+# UpdateStrategyRequest fields that are merged into the strategy params
+_UPDATE_KEYS = ("fast", "slow", "ktype", "qty", "size_mode", "dollar_size",
+                "stop_loss_pct", "take_profit_pct", "allow_real")
+
+class BacktestMARequest(msgspec.Struct, frozen=True):
     symbol: str
     fast: int = 20
     slow: int = 50
@@ -182,7 +305,7 @@ class BacktestMARequest(BaseModel):
     commission_per_share: Optional[float] = 0.0
     slippage_bps: Optional[float] = 0.0
 
-class BacktestMAGridRequest(BaseModel):
+class BacktestMAGridRequest(msgspec.Struct, frozen=True):
     symbol: str
     ktype: str = "K_1M"
     fast_min: int = 5
@@ -200,7 +323,7 @@ class BacktestMAGridRequest(BaseModel):
     slippage_bps: Optional[float] = 0.0
     top_n: int = 10
 
-class RiskConfig(BaseModel):
+class RiskConfig(msgspec.Struct, frozen=True):
     enabled: Optional[bool] = None
     max_usd_per_trade: Optional[float] = None
     max_open_positions: Optional[int] = None
@@ -209,27 +332,210 @@ class RiskConfig(BaseModel):
     trading_hours_pt: Optional[dict] = None  # {"start":"06:30","end":"13:00"}
     flatten_before_close_min: Optional[int] = None
 
-# ---: simple models for bot mode & flatten ---
-class BotModeRequest(BaseModel):
+# ---: simple models for bot mode & flatten (msgspec, like the order bodies) ---
+class BotModeRequest(msgspec.Struct, frozen=True):
     mode: str  # 'assist' | 'semi' | 'auto'
 
-class FlattenAllRequest(BaseModel):
+class LogEnableRequest(msgspec.Struct, frozen=True):
+    enabled: bool
+
+class FlattenAllRequest(msgspec.Struct, frozen=True):
     symbols: Optional[list[str]] = None  # if provided, only flatten these symbols
 
+class StrategyAction(msgspec.Struct, frozen=True):
+    op: str                           # 'list' | 'get' | 'patch' | 'start' | 'stop' | 'runs'
+    id: Optional[int] = None
+    params: Optional[dict] = None     # 'patch': UpdateStrategyRequest fields
+    limit: int = 50                   # 'runs'
+
+class StrategyBulkRequest(msgspec.Struct, frozen=True):
+    actions: list[StrategyAction]
+
 
 # ---------- Helpers ----------
 
-def _env_from_str(name: str):
-    return TrdEnv.SIMULATE if name.upper() == "SIMULATE" else TrdEnv.REAL
+# both casings the UI/clients send, so the common case is a single dict hit
+_ENV_MAP = {
+    "SIMULATE": TrdEnv.SIMULATE, "REAL": TrdEnv.REAL,
+    "simulate": TrdEnv.SIMULATE, "real": TrdEnv.REAL,
+}
+_ENV_NAMES = {TrdEnv.SIMULATE: "SIMULATE", TrdEnv.REAL: "REAL"}
+
+def _msgspec_body(model: type, optional: bool = False):
+    """Dependency that decodes the JSON request body into a msgspec Struct (422 on bad input).
+    With optional=True an empty body yields model() with its defaults."""
+    decoder = msgspec.json.Decoder(model, strict=False)
+
+    async def _decode(request: Request):
+        raw = await request.body()
+        if optional and not raw.strip():
+            return model()
+        try:
+            return decoder.decode(raw)
+        except msgspec.MsgspecError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    # read back by _openapi() to document the body FastAPI can't see through Depends
+    _decode.msgspec_body = (model, optional)
+    return _decode
+
+def _openapi() -> Dict[str, Any]:
+    """FastAPI's schema plus the request bodies of routes that decode through _msgspec_body."""
+    if app.openapi_schema:
+        return app.openapi_schema
+    schema = FastAPI.openapi(app)
+    bodies = []
+    for route in app.routes:
+        for dep in getattr(getattr(route, "dependant", None), "dependencies", ()):
+            spec = getattr(dep.call, "msgspec_body", None)
+            if spec:
+                bodies.append((route, *spec))
+    if not bodies:
+        return schema
+    refs, components = msgspec.json.schema_components(
+        [model for _, model, _ in bodies], ref_template="#/components/schemas/{name}",
+    )
+    schema.setdefault("components", {}).setdefault("schemas", {}).update(components)
+    for (route, _model, optional), ref in zip(bodies, refs):
+        ops = schema["paths"].get(route.path_format, {})
+        for method in route.methods:
+            if method.lower() in ops:
+                ops[method.lower()]["requestBody"] = {
+                    "required": not optional,
+                    "content": {"application/json": {"schema": ref}},
+                }
+    return schema
+
+app.openapi = _openapi
+
+def _env_from_str(name: str) -> Any:
+    env = _ENV_MAP.get(name)
+    if env is None:
+        env = _ENV_MAP.get(name.upper(), TrdEnv.REAL)
+    return env
+
+def _json_default(o: Any) -> str:
+    # timestamps match the ISO form FastAPI's encoder gives the non-streamed responses
+    iso = getattr(o, "isoformat", None)
+    return iso() if callable(iso) else str(o)
+
+def _ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Encode rows as newline-delimited JSON, one chunk per row."""
+    for row in rows:
+        # orjson like the non-streamed responses (NaN -> null, same datetime form)
+        yield orjson.dumps(row, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+
+def _json_array(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Encode rows as one JSON array, emitted a row at a time."""
+    sep = b"["
+    for row in rows:
+        yield sep + orjson.dumps(row)
+        sep = b","
+    yield b"[]" if sep == b"[" else b"]"
+
+def _stream_rows(rows: Iterable[Dict[str, Any]]) -> StreamingResponse:
+    return StreamingResponse(_ndjson(rows), media_type="application/x-ndjson")
 
 def set_client(c: Optional[MoomooClient]) -> None:
     """Set the singleton broker client."""
-    global client
-    client = c
+    _clients.set(c)
 
 def get_client() -> Optional[MoomooClient]:
     """Return the singleton broker client."""
-    return client
+    return _clients.client
+
+def _remember_pos_count(c: MoomooClient, pos: Any) -> None:
+    global _last_pos_count
+    if isinstance(pos, list):
+        _last_pos_count = (time.monotonic(), c, c.account_id, len(pos))
+
+def _normalize_bot_mode_setting() -> None:
+    """One-time migration: older builds could store the mode JSON-quoted ('"semi"')."""
+    global _bot_mode
+    val = get_setting("bot_mode")
+    if val:
+        try:
+            j = json.loads(val)
+        except ValueError:
+            j = None
+        if isinstance(j, str):
+            val = j
+            set_setting("bot_mode", val)
+    _bot_mode = val or "assist"
+
+def _get_bot_mode() -> str:
+    """Current bot mode for stamping action logs, without a settings query per call."""
+    global _bot_mode
+    mode = _bot_mode
+    if mode is None:
+        mode = _bot_mode = get_setting("bot_mode") or "assist"
+    return mode
+
+def _log_action(
+    action: str,
+    *,
+    mode: Optional[str] = None,
+    symbol: Optional[str] = None,
+    side: Optional[str] = None,
+    qty: Optional[float] = None,
+    price: Optional[float] = None,
+    reason: str = "",
+    status: str = "ok",
+    extra: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Queue an action_log entry (same fields as insert_action_log), timestamped now.
+    No-op while action logging is off (ACTION_LOG_ENABLED / PUT /logs/enable)."""
+    global _action_log_wake_pending
+    if not _action_log_enabled:
+        return
+    ts = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+    _action_log_buf.append((ts, mode, action, symbol, side, qty, price, reason, status, extra))
+    loop = _action_log_loop
+    if loop is None:
+        _flush_action_logs()  # flusher not running; write through
+    elif not _action_log_wake_pending:
+        # racing appenders may both schedule a wake; Event.set() is idempotent
+        _action_log_wake_pending = True
+        loop.call_soon_threadsafe(_action_log_wake.set)
+
+def _flush_action_logs() -> None:
+    rows = []
+    while True:
+        try:
+            rows.append(_action_log_buf.popleft())
+        except IndexError:
+            break
+    insert_action_logs_bulk(rows)
+
+async def _action_log_flusher() -> None:
+    global _action_log_wake_pending
+    while True:
+        await _action_log_wake.wait()
+        _action_log_wake.clear()
+        if len(_action_log_buf) < _ACTION_LOG_BATCH:
+            await asyncio.sleep(_ACTION_LOG_LINGER_SEC)  # let a burst accumulate
+        # re-arm before draining: a row appended from here on either makes this flush
+        # or schedules the next wake
+        _action_log_wake_pending = False
+        try:
+            await asyncio.to_thread(_flush_action_logs)
+        except Exception:
+            logger.exception("Action log flush failed")
+
+def _forget_pos_count() -> None:
+    global _last_pos_count
+    _last_pos_count = None
+
+async def require_client() -> MoomooClient:
+    """Route dependency: the connected broker client, or 400 if there is none.
+    Async so FastAPI resolves it on the event loop instead of a threadpool hop."""
+    return _clients.require_connected()
+
+async def require_account() -> MoomooClient:
+    """Like require_client, but also 400s when no trading account has been selected."""
+    c = _clients.require_connected()
+    if not c.account_id:
+        raise HTTPException(status_code=400, detail="No account selected")
+    return c
 
 
 # ---------- App lifecycle (automation) ----------
@@ -237,52 +543,71 @@ def get_client() -> Optional[MoomooClient]:
 @app.on_event("startup")
 async def _on_startup():
     # Start scheduler if automation modules are importable
-    global scheduler
+    global scheduler, _action_log_loop, _action_log_wake, _action_log_task
     if _AUTOMATION_AVAILABLE:
         init_db()
+        _normalize_bot_mode_setting()
         scheduler = TraderScheduler(get_client)  # pass accessor
         scheduler.register("ma_crossover", ma_crossover_step)
         scheduler.start()
+        _action_log_wake = asyncio.Event()
+        _action_log_task = asyncio.create_task(_action_log_flusher())
+        _action_log_loop = asyncio.get_running_loop()
 
 @app.on_event("shutdown")
 async def _on_shutdown():
     # Stop scheduler gracefully
-    global scheduler
+    global scheduler, _action_log_loop, _action_log_task
     if scheduler:
         await scheduler.stop()
         scheduler = None
+    # Stop the log flusher and write whatever is still queued
+    if _action_log_task is not None:
+        _action_log_loop = None
+        _action_log_task.cancel()
+        try:
+            await _action_log_task
+        except asyncio.CancelledError:
+            pass
+        _action_log_task = None
+        _flush_action_logs()
 
 
 # ---------- Routes ----------
 
+# body never changes; built once so pings skip JSON encoding entirely
+_HEALTH_RESP = Response(content=b'{"status":"ok"}', media_type="application/json")
+
 @app.get("/")
-def health_check():
-    return {"status": "ok"}
+async def health_check():
+    return _HEALTH_RESP
 
 
 # --- Connection & accounts ---
 
 @app.post("/connect")
-def connect(req: ConnectRequest):
+def connect(req: ConnectRequest = Depends(_msgspec_body(ConnectRequest))):
     """
     Connect to the OpenD gateway using host/port from request JSON
     or .env (MOOMOO_HOST/MOOMOO_PORT). Keeps a singleton client.
     """
-    host = req.host or os.getenv("MOOMOO_HOST", "127.0.0.1")
-    port = req.port or int(os.getenv("MOOMOO_PORT", "11111"))
-    _ = req.client_id or int(os.getenv("MOOMOO_CLIENT_ID", "1"))  # parity only
+    host = req.host or _settings.host
+    port = req.port or _settings.port
+    _ = req.client_id or _settings.client_id  # parity only
 
     try:
         c = MoomooClient(host=host, port=port)  # client_id not required by current build
-        c.connect()
-        set_client(c)
+        with _clients.lock:  # one connect/disconnect at a time
+            c.connect()
+            set_client(c)
         # persist partial session (account may be None here)
         try:
+            env = getattr(c, "env", None)
             save_session(
                 host,
                 port,
                 getattr(c, "account_id", None),
-                getattr(c, "env", None).name if getattr(c, "env", None) else None,
+                env.name if env else None,
             )
         except Exception:
             pass
@@ -295,28 +620,25 @@ def connect(req: ConnectRequest):
         raise HTTPException(status_code=500, detail=f"Failed to connect: {e}")
 
 @app.get("/accounts")
-def list_accounts():
+async def list_accounts(c: MoomooClient = Depends(require_client)):
     """
     Return available account IDs. Requires an active connection.
     """
-    c = get_client()
-    if c is None or not c.connected:
-        raise HTTPException(status_code=400, detail="Not connected")
     try:
-        return c.list_accounts()
+        return await asyncio.to_thread(c.list_accounts)
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list accounts: {e}")
 
 @app.post("/accounts/select")
-def select_account(req: SelectAccountRequest):
+def select_account(
+    req: SelectAccountRequest = Depends(_msgspec_body(SelectAccountRequest)),
+    c: MoomooClient = Depends(require_client),
+):
     """
     Select the active account + env (SIMULATE/REAL).
     """
-    c = get_client()
-    if c is None or not c.connected:
-        raise HTTPException(status_code=400, detail="Not connected")
     try:
         env = _env_from_str(req.trd_env)
         c.set_account(req.account_id, env)
@@ -337,99 +659,92 @@ def select_account(req: SelectAccountRequest):
         raise HTTPException(status_code=500, detail=f"Failed to select account: {e}")
 
 @app.get("/accounts/active")
-def accounts_active():
+def accounts_active(c: MoomooClient = Depends(require_client)):
     """
     Inspect currently selected account/env.
     """
-    c = get_client()
-    if c is None or not c.connected:
-        raise HTTPException(status_code=400, detail="Not connected")
-    return {
-        "account_id": c.account_id,
-        "trd_env": "SIMULATE" if getattr(c, "env", None) == TrdEnv.SIMULATE else "REAL"
-    }
+    global _accounts_active_cache
+    account_id, env = c.account_id, getattr(c, "env", None)
+    cached = _accounts_active_cache
+    if cached is None or cached[0] is not c or cached[1] != account_id or cached[2] != env:
+        body = orjson.dumps({"account_id": account_id, "trd_env": _ENV_NAMES.get(env, "REAL")})
+        cached = _accounts_active_cache = (c, account_id, env, body)
+    return Response(content=cached[3], media_type="application/json")
 
 @app.get("/debug/accounts_raw")
-def accounts_raw():
+def accounts_raw(c: MoomooClient = Depends(require_client)):
     """
     Raw passthrough of get_acc_list to help debug schema/signature differences.
     """
-    c = get_client()
-    if c is None or not c.connected:
-        raise HTTPException(status_code=400, detail="Not connected")
     try:
         ret, df = c.trading_ctx.get_acc_list(trd_env=c.env)  # type: ignore[attr-defined]
     except TypeError:
         ret, df = c.trading_ctx.get_acc_list()  # type: ignore[attr-defined]
     if ret != 0:
         raise HTTPException(status_code=500, detail=f"get_acc_list failed: {df}")
-    try:
-        import pandas as pd
-        if isinstance(df, pd.DataFrame):
+    # duck-type the DataFrame so this debug route never pays for importing pandas itself
+    if hasattr(df, "to_dict"):
+        try:
             return df.to_dict(orient="records")
-    except Exception:
-        pass
+        except Exception:
+            pass
     return df
 
 
 # --- Positions & orders ---
 
 @app.get("/positions")
-def get_positions():
+async def get_positions(stream: bool = False, c: MoomooClient = Depends(require_client)):
     """
     Return current positions for the active account.
+    With ?stream=1 the rows are sent as NDJSON (application/x-ndjson) as they are encoded.
     """
-    c = get_client()
-    if c is None or not c.connected:
-        raise HTTPException(status_code=400, detail="Not connected")
     try:
-        return c.get_positions()
+        if stream:
+            return _stream_rows(await asyncio.to_thread(c.iter_positions))
+        pos = await asyncio.to_thread(c.get_positions)
+        _remember_pos_count(c, pos)
+        return pos
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get positions: {e}")
 
 @app.get("/orders")
-def get_orders():
+async def get_orders(stream: bool = False, c: MoomooClient = Depends(require_client)):
     """
     Return orders for the active account.
+    With ?stream=1 the rows are sent as NDJSON (application/x-ndjson) as they are encoded.
     """
-    c = get_client()
-    if c is None or not c.connected:
-        raise HTTPException(status_code=400, detail="Not connected")
     try:
-        return c.get_orders()
+        if stream:
+            return _stream_rows(await asyncio.to_thread(c.iter_orders))
+        return await asyncio.to_thread(c.get_orders)
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get orders: {e}")
 
 @app.get("/orders/{order_id}")
-def get_order(order_id: str):
+async def get_order(order_id: str, c: MoomooClient = Depends(require_client)):
     """
     Return a single order by ID.
     """
-    c = get_client()
-    if c is None or not c.connected:
-        raise HTTPException(status_code=400, detail="Not connected")
     try:
-        return c.get_order(order_id)
+        return await asyncio.to_thread(c.get_order, order_id)
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get order: {e}")
 
 @app.post("/orders/place")
-def place_order(req: PlaceOrderRequest):
+async def place_order(
+    req: PlaceOrderRequest = Depends(_msgspec_body(PlaceOrderRequest)),
+    c: MoomooClient = Depends(require_account),
+):
     """
     Place a market or limit order for the active account (with risk checks).
     """
-    c = get_client()
-    if c is None or not c.connected:
-        raise HTTPException(status_code=400, detail="Not connected")
-    if not c.account_id:
-        raise HTTPException(status_code=400, detail="No account selected")
-
     side = (req.side or "").upper()
     if side not in {"BUY", "SELL"}:
         raise HTTPException(status_code=400, detail=f"Invalid side: {req.side}")
@@ -445,9 +760,10 @@ def place_order(req: PlaceOrderRequest):
     if qty <= 0:
         raise HTTPException(status_code=400, detail="qty must be > 0")
 
-    # Risk guardrails (raises ValueError when blocked)
+    # Risk guardrails (raises ValueError when blocked); may fetch a price / positions
     try:
-        enforce_order_limits(
+        await asyncio.to_thread(
+            enforce_order_limits,
             client=c,
             symbol=req.symbol,
             qty=qty,
@@ -456,86 +772,85 @@ def place_order(req: PlaceOrderRequest):
             price=req.price,
         )
     except ValueError as e:
-        insert_action_log(
-            "place", mode=(get_setting("bot_mode") or "assist"),
+        _log_action(
+            "place", mode=_get_bot_mode(),
             symbol=req.symbol, side=side, qty=qty, price=req.price,
             reason="risk_block", status="blocked", extra={"msg": str(e)}
         )
         raise HTTPException(status_code=400, detail=f"Blocked by risk: {e}")
 
     try:
-        result = c.place_order(
+        result = await asyncio.to_thread(
+            c.place_order,
             symbol=req.symbol,
             qty=qty,
             side=side,
             order_type=order_type,
             price=req.price,
         )
-        insert_action_log(
-            "place", mode=(get_setting("bot_mode") or "assist"),
+        _log_action(
+            "place", mode=_get_bot_mode(),
             symbol=req.symbol, side=side, qty=qty, price=req.price,
             reason="manual/place_order", status="ok", extra={"result": result}
         )
+        _forget_pos_count()
         return {"status": "ok", "result": result}
     except Exception as e:
-        insert_action_log(
-            "place", mode=(get_setting("bot_mode") or "assist"),
+        _log_action(
+            "place", mode=_get_bot_mode(),
             symbol=req.symbol, side=side, qty=qty, price=req.price,
             reason="exception", status="error", extra={"msg": str(e)}
         )
         raise HTTPException(status_code=500, detail=f"place_order failed: {e}")
 
 @app.post("/orders/cancel")
-def cancel_order(req: CancelOrderRequest):
+async def cancel_order(
+    req: CancelOrderRequest = Depends(_msgspec_body(CancelOrderRequest)),
+    c: MoomooClient = Depends(require_client),
+):
     """
     Cancel an order by ID.
     """
-    c = get_client()
-    if c is None or not c.connected:
-        raise HTTPException(status_code=400, detail="Not connected")
     try:
-        res = c.cancel_order(req.order_id)
-        insert_action_log("cancel", mode=(get_setting("bot_mode") or "assist"),
-                          symbol=None, side=None, qty=None, price=None,
-                          reason=f"cancel {req.order_id}", status="ok", extra={"result": res})
+        res = await asyncio.to_thread(c.cancel_order, req.order_id)
+        _log_action("cancel", mode=_get_bot_mode(),
+                    symbol=None, side=None, qty=None, price=None,
+                    reason=f"cancel {req.order_id}", status="ok", extra={"result": res})
         return res
     except RuntimeError as e:
-        insert_action_log("cancel", mode=(get_setting("bot_mode") or "assist"),
-                          reason=f"runtime_error {req.order_id}", status="error", extra={"msg": str(e)})
+        _log_action("cancel", mode=_get_bot_mode(),
+                    reason=f"runtime_error {req.order_id}", status="error", extra={"msg": str(e)})
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        insert_action_log("cancel", mode=(get_setting("bot_mode") or "assist"),
-                          reason=f"exception {req.order_id}", status="error", extra={"msg": str(e)})
+        _log_action("cancel", mode=_get_bot_mode(),
+                    reason=f"exception {req.order_id}", status="error", extra={"msg": str(e)})
         raise HTTPException(status_code=500, detail=f"Failed to cancel order: {e}")
 
 
 # --- Quotes ---
 
 @app.post("/quotes/subscribe")
-def quotes_subscribe(req: SubscribeQuotesRequest):
+async def quotes_subscribe(
+    req: SubscribeQuotesRequest = Depends(_msgspec_body(SubscribeQuotesRequest)),
+    c: MoomooClient = Depends(require_client),
+):
     """
     Subscribe to basic quotes for one or more symbols.
     """
-    c = get_client()
-    if c is None or not c.connected:
-        raise HTTPException(status_code=400, detail="Not connected")
     try:
-        return c.subscribe_quotes(req.symbols)
+        return await asyncio.to_thread(c.subscribe_quotes, req.symbols)
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to subscribe quotes: {e}")
 
 @app.get("/quotes/{symbol}")
-def quotes_latest(symbol: str):
+async def quotes_latest(symbol: str, c: MoomooClient = Depends(require_client)):
     """
     Get the latest quote for a symbol.
     """
-    c = get_client()
-    if c is None or not c.connected:
-        raise HTTPException(status_code=400, detail="Not connected")
     try:
-        return c.get_quote_latest(symbol)
+        return await asyncio.to_thread(c.get_quote_latest, symbol)
     except RuntimeError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -545,7 +860,7 @@ def quotes_latest(symbol: str):
 # --- Sync deals + PnL ---
 
 @app.post("/sync/deals")
-def sync_deals(simulate_if_absent: bool = True):
+async def sync_deals(simulate_if_absent: bool = True, c: MoomooClient = Depends(require_client)):
     """
     Pull recent fills from broker and store them locally.
 
@@ -555,14 +870,28 @@ def sync_deals(simulate_if_absent: bool = True):
       - Otherwise pull a last close via unified market-data fallback and use that
     This synthetic path is for development/testing only.
     """
-    c = get_client()
-    if c is None or not c.connected:
-        raise HTTPException(status_code=400, detail="Not connected")
+    # several broker round-trips plus SQLite writes; run the lot off the event loop
+    return await asyncio.to_thread(_sync_deals, c, simulate_if_absent)
+
+def _last_close(c: MoomooClient, code: str) -> float:
+    """Last 1-minute close via the unified market-data fallback; 0.0 if unavailable."""
+    try:
+        closes, _source = get_closes_safely(c, code, "K_1M", 1)
+        if len(closes):
+            return float(closes[-1])
+    except Exception:
+        pass
+    return 0.0
 
+# order_status values that become fills in the /sync/deals orders fallback
+_FILLED_STATUSES = frozenset({"FILLED", "FILLED_ALL", "DEALT", "SUCCESS"})
+_PENDING_STATUSES = frozenset({"SUBMITTED", "SUBMITTING"})
+
+def _sync_deals(c: MoomooClient, simulate_if_absent: bool) -> dict:
     # 1) Try real fills first
     try:
         recs = c.get_deals()
-        inserted = 0
+        buf: List[Tuple[str, str, str, float, float, str]] = []
         for r in recs:
             oid = r.get("order_id") or r.get("orderId") or ""
             code = r.get("code") or r.get("stock_code") or ""
@@ -572,9 +901,9 @@ def sync_deals(simulate_if_absent: bool = True):
             ts = str(r.get("create_time") or r.get("time") or r.get("ts") or "")
             if not code or not side or qty <= 0 or price <= 0 or not ts:
                 continue
-            record_fill(str(oid), str(code), "BUY" if "BUY" in side else "SELL", qty, price, ts)
-            inserted += 1
-        return {"status": "ok", "inserted": inserted, "source": "broker_deals"}
+            buf.append((str(oid), str(code), "BUY" if "BUY" in side else "SELL", qty, price, ts))
+        record_fills_bulk(buf)
+        return {"status": "ok", "inserted": len(buf), "source": "broker_deals"}
     except RuntimeError as e:
         msg = str(e)
 
@@ -588,35 +917,51 @@ def sync_deals(simulate_if_absent: bool = True):
     except Exception as e2:
         raise HTTPException(status_code=500, detail=f"Failed to fetch orders for fallback: {e2}")
 
-    inserted = 0
+    # pass 1: orders that would become fills; note the symbols still missing a price
+    candidates = []
+    needs_price = set()
     for o in orders:
+        # status decides most rows (cancelled, failed, ...), so check it before parsing anything else
         status = str(o.get("order_status") or "").upper()
+        is_filled = status in _FILLED_STATUSES
+        if not is_filled and not (simulate_if_absent and status in _PENDING_STATUSES):
+            continue
+
+        price = float(o.get("dealt_avg_price") or 0)
+        if not is_filled and price > 0:
+            continue  # pending orders are only synthesized when they carry no price yet
+
         code = str(o.get("code") or o.get("stock_code") or "")
         side = str(o.get("trd_side") or "").upper()
         oid = str(o.get("order_id") or o.get("orderId") or "")
         qty = float(o.get("qty") or 0)
-
         if not code or not side or not oid or qty <= 0:
             continue
 
-        price = float(o.get("dealt_avg_price") or 0)
-        is_filled = status in {"FILLED", "FILLED_ALL", "DEALT", "SUCCESS"}
-        may_synthesize = simulate_if_absent and status in {"SUBMITTED", "SUBMITTING"} and price <= 0
-
-        if price <= 0 and (is_filled or may_synthesize):
-            try:
-                bars, _source = get_bars_safely(c, code, "K_1M", 1)
-                if bars:
-                    price = float(bars[-1].get("close", 0) or 0)
-            except Exception:
-                price = 0.0
-
-        if (is_filled or may_synthesize) and price > 0:
-            ts = str(o.get("updated_time") or o.get("create_time") or datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
-            record_fill(oid, code, "BUY" if "BUY" in side else "SELL", qty, price, ts)
-            inserted += 1
-
-    return {"status": "ok", "inserted": inserted, "source": "orders_fallback"}
+        candidates.append((o, oid, code, side, qty, price))
+        if price <= 0:
+            needs_price.add(code)
+
+    # one last-close lookup per symbol, not per order, fetched in parallel
+    prices: Dict[str, float] = {}
+    if needs_price:
+        codes = list(needs_price)
+        with ThreadPoolExecutor(max_workers=min(8, len(codes))) as pool:
+            prices = dict(zip(codes, pool.map(lambda code: _last_close(c, code), codes)))
+
+    # pass 2: build fill rows
+    buf = []
+    # one timestamp for every synthesized fill in this sync
+    now_str = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+    for o, oid, code, side, qty, price in candidates:
+        if price <= 0:
+            price = prices.get(code, 0.0)
+        if price > 0:
+            ts = str(o.get("updated_time") or o.get("create_time") or now_str)
+            buf.append((oid, code, "BUY" if "BUY" in side else "SELL", qty, price, ts))
+
+    record_fills_bulk(buf)
+    return {"status": "ok", "inserted": len(buf), "source": "orders_fallback"}
 
 @app.get("/pnl/today")
 def pnl_today_endpoint():
@@ -628,9 +973,9 @@ def pnl_today_endpoint():
 
 @app.get("/pnl/history")
 def pnl_history_endpoint(days: int = 7):
-    """Realized PnL by day for the last N days."""
+    """Realized PnL by day for the last N days (JSON array, streamed row by row)."""
     try:
-        return pnl_history(days=days)
+        return StreamingResponse(_json_array(iter_pnl_history(days=days)), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to compute PnL history: {e}")
 
@@ -642,30 +987,20 @@ def bot_mode_get():
     """
     Return current bot autonomy mode (assist|semi|auto). Defaults to 'assist' if unset.
     """
-    val = get_setting("bot_mode") or "assist"
-    try:
-        # Normalize JSON/string to plain string
-        if isinstance(val, str):
-            try:
-                j = json.loads(val)
-                if isinstance(j, str):
-                    val = j
-            except Exception:
-                pass
-    except Exception:
-        pass
-    return {"mode": val}
+    return {"mode": _get_bot_mode()}
 
 @app.put("/bot/mode")
-def bot_mode_put(req: BotModeRequest):
+def bot_mode_put(req: BotModeRequest = Depends(_msgspec_body(BotModeRequest))):
     """
     Update bot autonomy mode.
     """
+    global _bot_mode
     mode = (req.mode or "").lower().strip()
     if mode not in {"assist", "semi", "auto"}:
         raise HTTPException(status_code=400, detail="mode must be one of: assist|semi|auto")
     set_setting("bot_mode", mode)
-    insert_action_log("mode_change", mode=mode, reason="user_update", status="ok")
+    _bot_mode = mode
+    _log_action("mode_change", mode=mode, reason="user_update", status="ok")
     return {"mode": mode}
 
 
@@ -677,69 +1012,89 @@ def action_logs(limit: int = 100, symbol: Optional[str] = None, since_hours: Opt
     List recent action log entries for explainability/chronology.
     """
     try:
+        _flush_action_logs()  # include entries still waiting for the flusher
         return list_action_logs(limit=limit, symbol=symbol, since_hours=since_hours)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch action logs: {e}")
 
 
+@app.put("/logs/enable")
+def action_logs_enable(req: LogEnableRequest = Depends(_msgspec_body(LogEnableRequest))):
+    """
+    Turn action logging on/off for this process (initial value from ACTION_LOG_ENABLED).
+    """
+    global _action_log_enabled
+    _action_log_enabled = req.enabled
+    return {"enabled": _action_log_enabled}
+
+
 # --- Flatten All ---
 
+def _flatten_targets(pos: List[Dict[str, Any]], sym_filter: Optional[frozenset]) -> List[Tuple[str, float, str]]:
+    """(code, abs qty, closing side) for every non-flat position, optionally limited to sym_filter."""
+    targets = []
+    append = targets.append
+    for p in pos:
+        get = p.get
+        code = get("code") or get("stock_code") or get("symbol")
+        # filter on symbol before touching the qty fields
+        if not code or (sym_filter is not None and code not in sym_filter):
+            continue
+        # best-effort qty detection across schemas
+        qty = float(get("qty") or get("qty_today") or get("qty_total", 0) or 0)
+        if qty:
+            append((code, abs(qty), "SELL" if qty > 0 else "BUY"))
+    return targets
+
 @app.post("/positions/flatten")
-def positions_flatten(body: FlattenAllRequest = FlattenAllRequest()):
+async def positions_flatten(
+    body: FlattenAllRequest = Depends(_msgspec_body(FlattenAllRequest, optional=True)),
+    c: MoomooClient = Depends(require_account),
+):
     """
     Close all open positions by placing opposite MARKET orders.
     - Disallowed when account env is REAL (safety). Revisit with explicit flag later.
     """
-    c = get_client()
-    if c is None or not c.connected:
-        raise HTTPException(status_code=400, detail="Not connected")
-    if not c.account_id:
-        raise HTTPException(status_code=400, detail="No account selected")
     if getattr(c, "env", None) == TrdEnv.REAL:
-        insert_action_log("flatten", mode=(get_setting("bot_mode") or "assist"),
-                          reason="blocked_real_env", status="blocked")
+        _log_action("flatten", mode=_get_bot_mode(),
+                    reason="blocked_real_env", status="blocked")
         raise HTTPException(status_code=400, detail="Flatten disabled in REAL environment")
 
     try:
-        pos = c.get_positions()
+        pos = await asyncio.to_thread(c.get_positions)
         if not isinstance(pos, list):
             pos = []
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch positions: {e}")
 
-    target_symbols = set([s.strip() for s in (body.symbols or []) if s and s.strip()]) if body.symbols else None
-
-    attempts = []
-    for p in pos:
-        code = p.get("code") or p.get("stock_code") or p.get("symbol")
-        if not code:
-            continue
-        if target_symbols and code not in target_symbols:
-            continue
+    # None means "everything"; an all-blank list also degrades to no filter, as before
+    sym_filter = frozenset(s.strip() for s in (body.symbols or ()) if s and s.strip()) or None
 
-        # best-effort qty detection across schemas
-        qty = float(
-            p.get("qty")
-            or p.get("qty_today")
-            or p.get("qty_total", 0)
-            or 0
-        )
-        if qty == 0:
-            continue
+    targets = _flatten_targets(pos, sym_filter)
 
-        side = "SELL" if qty > 0 else "BUY"
-        try:
-            res = c.place_order(symbol=code, qty=abs(qty), side=side, order_type="MARKET", price=None)
-            attempts.append({"symbol": code, "qty": abs(qty), "side": side, "status": "ok", "result": res})
-            insert_action_log("flatten", mode=(get_setting("bot_mode") or "assist"),
-                              symbol=code, side=side, qty=abs(qty),
-                              reason="flatten_all", status="ok", extra={"result": res})
-        except Exception as e:
-            attempts.append({"symbol": code, "qty": abs(qty), "side": side, "status": "error", "error": str(e)})
-            insert_action_log("flatten", mode=(get_setting("bot_mode") or "assist"),
-                              symbol=code, side=side, qty=abs(qty),
-                              reason="exception", status="error", extra={"msg": str(e)})
+    # send every closing order at once; wall time is the slowest broker round-trip, not the sum
+    results = await asyncio.gather(
+        *(
+            asyncio.to_thread(c.place_order, symbol=code, qty=qty, side=side, order_type="MARKET", price=None)
+            for code, qty, side in targets
+        ),
+        return_exceptions=True,
+    )
 
+    attempts = []
+    for (code, qty, side), res in zip(targets, results):
+        if isinstance(res, BaseException):
+            attempts.append({"symbol": code, "qty": qty, "side": side, "status": "error", "error": str(res)})
+            _log_action("flatten", mode=_get_bot_mode(),
+                        symbol=code, side=side, qty=qty,
+                        reason="exception", status="error", extra={"msg": str(res)})
+        else:
+            attempts.append({"symbol": code, "qty": qty, "side": side, "status": "ok", "result": res})
+            _log_action("flatten", mode=_get_bot_mode(),
+                        symbol=code, side=side, qty=qty,
+                        reason="flatten_all", status="ok", extra={"result": res})
+
+    _forget_pos_count()
     return {"status": "ok", "attempts": attempts}
 
 
@@ -755,9 +1110,7 @@ def automation_start_ma(req: StartMACrossoverRequest):
             status_code=500,
             detail=f"Automation modules not available: {_AUTOMATION_IMPORT_ERR}",
         )
-    c = get_client()
-    if c is None or not c.connected:
-        raise HTTPException(status_code=400, detail="Not connected")
+    c = _clients.require_connected()
     if scheduler is None:
         raise HTTPException(status_code=500, detail="Scheduler not available")
     if req.slow <= req.fast:
@@ -779,9 +1132,10 @@ def automation_start_ma(req: StartMACrossoverRequest):
     }
     
     sid = insert_strategy("ma_crossover", req.symbol.strip(), params, int(req.interval_sec))
-    insert_action_log("start_strategy", mode=(get_setting("bot_mode") or "assist"),
-                      symbol=req.symbol.strip(), reason="ma_crossover", status="ok",
-                      extra={"strategy_id": sid, "params": params})
+    scheduler.notify()
+    _log_action("start_strategy", mode=_get_bot_mode(),
+                symbol=req.symbol.strip(), reason="ma_crossover", status="ok",
+                extra={"strategy_id": sid, "params": params})
     return {"status": "ok", "strategy_id": sid, "name": "ma_crossover", "symbol": req.symbol, "params": params}
 
 @app.get("/automation/strategies")
@@ -814,9 +1168,9 @@ def automation_update(strategy_id: int, req: UpdateStrategyRequest):
         raise HTTPException(status_code=500, detail="Automation modules not available")
 
     p = {}
-    for k in ["fast", "slow", "ktype", "qty", "size_mode", "dollar_size",
-              "stop_loss_pct", "take_profit_pct", "allow_real"]:
-        v = getattr(req, k)
+    fields = req.__dict__  # pydantic v2 keeps validated field values here
+    for k in _UPDATE_KEYS:
+        v = fields.get(k)
         if v is not None:
             p[k] = v
 
@@ -828,19 +1182,23 @@ def automation_update(strategy_id: int, req: UpdateStrategyRequest):
     )
     if not updated:
         raise HTTPException(status_code=404, detail="strategy not found")
-    insert_action_log("update_strategy", mode=(get_setting("bot_mode") or "assist"),
-                      reason=f"id={strategy_id}", status="ok", extra={"params": p, "interval_sec": req.interval_sec, "active": req.active})
+    _log_action("update_strategy", mode=_get_bot_mode(),
+                reason=f"id={strategy_id}", status="ok", extra={"params": p, "interval_sec": req.interval_sec, "active": req.active})
     return updated
 
 @app.get("/automation/strategies/{strategy_id}/runs")
-def automation_runs(strategy_id: int, limit: int = 50):
+def automation_runs(strategy_id: int, limit: int = 50, stream: bool = False):
     """
-    Recent run records for a strategy.
+    Recent run records for a strategy. ?stream=1 returns NDJSON.
     """
     if not _AUTOMATION_AVAILABLE:
         raise HTTPException(status_code=500, detail="Automation modules not available")
-    if not get_strategy(strategy_id):
+    if not strategy_exists(strategy_id):
         raise HTTPException(status_code=404, detail="strategy not found")
+    if stream:
+        # rows are read here, on the handler's thread: a sqlite connection must not be
+        # stepped from the threads StreamingResponse iterates on
+        return _stream_rows(list_runs(strategy_id, limit=limit))
     return list_runs(strategy_id, limit=limit)
 
 @app.post("/automation/stop/{strategy_id}")
@@ -850,11 +1208,11 @@ def automation_stop(strategy_id: int):
     """
     if not _AUTOMATION_AVAILABLE:
         raise HTTPException(status_code=500, detail="Automation modules not available")
-    if not get_strategy(strategy_id):
+    if not strategy_exists(strategy_id):
         raise HTTPException(status_code=404, detail="strategy not found")
     set_strategy_active(strategy_id, False)
-    insert_action_log("stop_strategy", mode=(get_setting("bot_mode") or "assist"),
-                      reason=f"id={strategy_id}", status="ok")
+    _log_action("stop_strategy", mode=_get_bot_mode(),
+                reason=f"id={strategy_id}", status="ok")
     return {"status": "ok", "strategy_id": strategy_id, "active": False}
 
 @app.post("/automation/start/{strategy_id}")
@@ -864,13 +1222,72 @@ def automation_reactivate(strategy_id: int):
     """
     if not _AUTOMATION_AVAILABLE:
         raise HTTPException(status_code=500, detail="Automation modules not available")
-    if not get_strategy(strategy_id):
+    if not strategy_exists(strategy_id):
         raise HTTPException(status_code=404, detail="strategy not found")
     set_strategy_active(strategy_id, True)
-    insert_action_log("start_strategy", mode=(get_setting("bot_mode") or "assist"),
-                      reason=f"id={strategy_id}", status="ok")
+    if scheduler is not None:
+        scheduler.notify()
+    _log_action("start_strategy", mode=_get_bot_mode(),
+                reason=f"id={strategy_id}", status="ok")
     return {"status": "ok", "strategy_id": strategy_id, "active": True}
 
+_STRATEGY_OPS = {
+    "get": automation_get,
+    "start": automation_reactivate,
+    "stop": automation_stop,
+}
+
+@app.post("/automation/strategies/bulk")
+def automation_bulk(req: StrategyBulkRequest = Depends(_msgspec_body(StrategyBulkRequest))):
+    """
+    Run several strategy operations in one round trip, in order.
+    Each entry of "results" is {"op", "result"} or {"op", "error", "status_code"};
+    one failing action does not stop the rest.
+    """
+    if not _AUTOMATION_AVAILABLE:
+        raise HTTPException(status_code=500, detail="Automation modules not available")
+    results = []
+    for a in req.actions:
+        try:
+            if a.op == "list":
+                res = automation_list()
+            elif a.id is None:
+                raise HTTPException(status_code=422, detail=f"'{a.op}' needs an id")
+            elif a.op in _STRATEGY_OPS:
+                res = _STRATEGY_OPS[a.op](a.id)
+            elif a.op == "patch":
+                try:
+                    upd = UpdateStrategyRequest(**(a.params or {}))
+                except ValueError as e:  # pydantic ValidationError
+                    raise HTTPException(status_code=422, detail=str(e))
+                res = automation_update(a.id, upd)
+            elif a.op == "runs":
+                res = automation_runs(a.id, limit=a.limit)
+            else:
+                raise HTTPException(status_code=422, detail=f"unknown op '{a.op}'")
+            results.append({"op": a.op, "result": res})
+        except HTTPException as e:
+            results.append({"op": a.op, "error": e.detail, "status_code": e.status_code})
+        except Exception as e:
+            # e.g. sqlite errors: report this action, keep going (earlier ones already applied)
+            logger.exception("bulk strategy op %r failed", a.op)
+            results.append({"op": a.op, "error": str(e), "status_code": 500})
+    return {"results": results}
+
+@app.get("/automation/ui-state")
+def automation_ui_state(strategy_id: Optional[int] = None):
+    """
+    What the UI loads on open, in one round trip: the strategy list, one strategy
+    (when ?strategy_id= is given; null if unknown) and the risk config.
+    """
+    if not _AUTOMATION_AVAILABLE:
+        raise HTTPException(status_code=500, detail="Automation modules not available")
+    return {
+        "strategies": list_strategies(),
+        "strategy": get_strategy(strategy_id) if strategy_id is not None else None,
+        "risk_config": risk_get(),
+    }
+
 
 # --- Risk config & status ---
 
@@ -885,14 +1302,17 @@ def risk_get():
         raise HTTPException(status_code=500, detail=f"Failed to read risk config: {e}")
 
 @app.put("/risk/config")
-def risk_put(req: RiskConfig):
+def risk_put(req: RiskConfig = Depends(_msgspec_body(RiskConfig))):
     """
     Update risk configuration (partial update).
     """
     try:
         cfg = _risk_load()
-        for k, v in req.model_dump(exclude_none=True).items():
-            cfg[k] = v
+        # req is already validated; read fields directly
+        for k in RiskConfig.__struct_fields__:
+            v = getattr(req, k)
+            if v is not None:
+                cfg[k] = v
         _risk_save(cfg)
         return cfg
     except Exception as e:
@@ -908,9 +1328,15 @@ def risk_status():
     try:
         c = get_client()
         if c and c.connected:
-            pos = c.get_positions()
-            if isinstance(pos, list):
-                open_positions = len(pos)
+            cached = _last_pos_count
+            if (cached is not None and cached[1] is c and cached[2] == c.account_id
+                    and time.monotonic() - cached[0] < _POS_COUNT_TTL_SEC):
+                open_positions = cached[3]
+            else:
+                pos = c.get_positions()
+                _remember_pos_count(c, pos)
+                if isinstance(pos, list):
+                    open_positions = len(pos)
     except Exception:
         pass
     return {"ok": True, "config": cfg, "open_positions": open_positions}
@@ -924,7 +1350,7 @@ def session_status():
     c = get_client()
     return {
         "saved": s or {},
-        "connected": bool(c and getattr(c, "connected", False)),
+        "connected": bool(c and c.connected),
         "active_account": {
             "account_id": getattr(c, "account_id", None),
             "trd_env": getattr(getattr(c, "env", None), "name", None),
@@ -932,7 +1358,7 @@ def session_status():
     }
 
 @app.post("/session/save")
-def session_save_endpoint(body: dict):
+def session_save_endpoint(body: Dict[str, Any]):
     host = body.get("host")
     port = int(body.get("port", 0))
     account_id = body.get("account_id")
@@ -954,21 +1380,22 @@ def disconnect():
     """
     Disconnect and clear the global client.
     """
-    c = get_client()
-    if c is None:
-        return {"status": "ok"}  # already clear
-    try:
-        c.disconnect()
-    except Exception:
-        pass  # ignore errors on shutdown
-    set_client(None)
+    with _clients.lock:
+        c = get_client()
+        if c is None:
+            return {"status": "ok"}  # already clear
+        try:
+            c.disconnect()
+        except Exception:
+            pass  # ignore errors on shutdown
+        set_client(None)
     return {"status": "disconnected"}
 
 
 # --- Backtest: single run ---
 
 @app.post("/backtest/ma-crossover")
-def backtest_ma(req: BacktestMARequest):
+def backtest_ma(req: BacktestMARequest = Depends(_msgspec_body(BacktestMARequest))):
     """
     Run a local MA-crossover backtest using CSV bars in data/bars/{SYMBOL}_{KTYPE}.csv.
     Returns metrics and the first 20 trades.
@@ -995,7 +1422,8 @@ def backtest_ma(req: BacktestMARequest):
             "entry_ts": t.entry_ts, "exit_ts": t.exit_ts, "side": t.side,
             "entry_px": t.entry_px, "exit_px": t.exit_px, "qty": t.qty, "pnl": t.pnl
         } for t in res.trades[:20]]
-        return {"metrics": res.metrics, "trades_sample": trades}
+        # plain floats/strs only; skip the jsonable_encoder walk
+        return _ORJSONResponse({"metrics": res.metrics, "trades_sample": trades})
     except FileNotFoundError as e:
         raise HTTPException(
             status_code=400,
@@ -1008,7 +1436,7 @@ def backtest_ma(req: BacktestMARequest):
 # --- Backtest: parameter grid ---
 
 @app.post("/backtest/ma-grid")
-def backtest_ma_grid(req: BacktestMAGridRequest):
+def backtest_ma_grid(req: BacktestMAGridRequest = Depends(_msgspec_body(BacktestMAGridRequest))):
     """
     Run an MA-crossover parameter sweep; returns top-N results by gross_pnl.
     """
@@ -1031,7 +1459,7 @@ def backtest_ma_grid(req: BacktestMAGridRequest):
             slippage_bps=float(req.slippage_bps or 0),
             top_n=int(req.top_n),
         )
-        return {"count": len(results), "results": results}
+        return _ORJSONResponse({"count": len(results), "results": results})
     except FileNotFoundError as e:
         raise HTTPException(
             status_code=400,
@@ -1039,3 +1467,22 @@ def backtest_ma_grid(req: BacktestMAGridRequest):
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Backtest grid failed: {e}")
+
+
+if __name__ == "__main__":
+    import importlib.util
+    import sys
+    import uvicorn
+
+    # Same as the README command (run from src/): uvloop + httptools when installed
+    # (uvicorn[standard]), single worker since the broker client and scheduler live here.
+    has = lambda mod: importlib.util.find_spec(mod) is not None
+    uvicorn.run(
+        app,
+        host=os.getenv("API_HOST", "127.0.0.1"),
+        port=int(os.getenv("API_PORT", "8000")),
+        loop="uvloop" if sys.platform != "win32" and has("uvloop") else "asyncio",
+        http="httptools" if has("httptools") else "h11",
+        backlog=4096,
+        limit_concurrency=2048,
+    )
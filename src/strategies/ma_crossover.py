@@ -10,6 +10,9 @@ translated into broker-specific order requests.
 
 from typing import Dict, Any, List, Optional
 import math
+import time
+
+import numpy as np
 
 from core.moomoo_client import MoomooClient, TrdEnv
 from core.storage import insert_run, pnl_today
@@ -25,20 +28,24 @@ try:
         market_ok_to_trade,
     )
 except Exception:
-    # If risk module isn't available, define no-op fallbacks so strategy still runs.
-    enforce_order_limits = None  # placing orders will skip centralized checks
+    # Without the risk module (risk.limits does not export all of these yet) step() runs
+    # on the fallbacks below. The order guards raise, so a step stops at the market
+    # check and is recorded as a SKIP before any entry or exit order.
+    enforce_order_limits = None
+
+    # minimal shape expected elsewhere; built once, step() only reads it
+    _FALLBACK_CFG = {
+        "enabled": False,
+        "max_usd_per_trade": 1e12,
+        "max_open_positions": 999,
+        "max_daily_loss_usd": 1e12,
+        "symbol_whitelist": [],
+        "trading_hours_pt": {"start": "06:30", "end": "13:00"},
+        "flatten_before_close_min": 0,
+    }
 
     def load_cfg():
-        # minimal shape expected elsewhere
-        return {
-            "enabled": False,
-            "max_usd_per_trade": 1e12,
-            "max_open_positions": 999,
-            "max_daily_loss_usd": 1e12,
-            "symbol_whitelist": [],
-            "trading_hours_pt": {"start": "06:30", "end": "13:00"},
-            "flatten_before_close_min": 0,
-        }
+        return _FALLBACK_CFG
 
     def market_open_now(*args, **kwargs) -> bool:
         return True
@@ -46,42 +53,84 @@ except Exception:
     def in_flatten_window(*args, **kwargs) -> bool:
         return False
 
-    def check_trade_limits(*args, **kwargs) -> None:
-        return None
+    # fail closed: never place orders without real trade/market checks
+    def check_trade_limits(*args, **kwargs) -> tuple[bool, str]:
+        raise RuntimeError("risk module unavailable")
 
-    def market_ok_to_trade(*args, **kwargs) -> bool:
-        return True
+    def market_ok_to_trade(*args, **kwargs) -> tuple[bool, str]:
+        raise RuntimeError("risk module unavailable")
 
 
 # data provider (futu first, yfinance fallback)
-from core.market_data import get_bars_safely
-
-def _normalize(symbol: str) -> str:
-    return symbol if "." in symbol else f"US.{symbol.upper()}"
-
-def _sma(vals: List[float]) -> float:
-    return sum(vals) / len(vals) if vals else 0.0
-
-def _current_position(client: MoomooClient, symbol: str) -> tuple[float, float]:
-    """Return (qty, avg_cost) for symbol; 0,0 if none."""
-    try:
-        code = _normalize(symbol)
-        poss = client.get_positions()
-        for p in poss:
-            if str(p.get("code") or p.get("stock_code")) == code:
+from core.market_data import _normalize, get_closes_safely
+
+def _sma(vals: np.ndarray) -> float:
+    return float(vals.mean()) if len(vals) else 0.0
+
+class PositionsCache:
+    """
+    Broker positions shared by every strategy that steps within `ttl` seconds, so one
+    scheduler pass costs one get_positions() RPC instead of one or two per strategy.
+    """
+
+    def __init__(self, ttl: float = 1.0) -> None:
+        self.ttl = ttl
+        self._key: Optional[tuple] = None  # (client, account_id) the rows belong to
+        self._at = 0.0
+        self._rows: List[Dict[str, Any]] = []
+        self._by_code: Dict[str, tuple[float, float]] = {}
+
+    @staticmethod
+    def _index(rows: List[Dict[str, Any]]) -> Dict[str, tuple[float, float]]:
+        """code -> (qty, avg_cost), resolving the broker's field-name variants once per refresh."""
+        by_code: Dict[str, tuple[float, float]] = {}
+        for p in rows:
+            code = str(p.get("code") or p.get("stock_code"))
+            if code in by_code:
+                continue  # first row for a code wins, as the old linear scan did
+            try:
                 qty = float(p.get("qty") or p.get("stock_qty") or p.get("position") or 0)
                 avg = float(p.get("cost_price") or p.get("cost_price_ex") or p.get("avg_cost") or 0)
-                return qty, avg
-    except Exception:
-        pass
-    return 0.0, 0.0
+            except (TypeError, ValueError):
+                qty, avg = 0.0, 0.0
+            by_code[code] = (qty, avg)
+        return by_code
+
+    def get(self, client: MoomooClient) -> List[Dict[str, Any]]:
+        key = (client, client.account_id)
+        now = time.monotonic()
+        if key != self._key or now - self._at > self.ttl:
+            rows = client.get_positions()
+            self._rows = rows if isinstance(rows, list) else []
+            self._by_code = self._index(self._rows)
+            self._key, self._at = key, now
+        return self._rows
+
+    def position(self, client: MoomooClient, code: str) -> tuple[float, float, int]:
+        """(qty, avg_cost, open positions) from one snapshot; qty/avg are 0,0 if not held."""
+        rows = self.get(client)
+        qty, avg = self._by_code.get(code, (0.0, 0.0))
+        return qty, avg, len(rows)
+
+    def invalidate(self) -> None:
+        """Drop the snapshot (call after placing an order)."""
+        self._key = None
+
+
+_positions = PositionsCache()
+
+def _place(client: MoomooClient, **kwargs: Any) -> Any:
+    try:
+        return client.place_order(**kwargs)
+    finally:
+        _positions.invalidate()
 
-def _open_positions_count(client: MoomooClient) -> int:
+def _current_position(client: MoomooClient, symbol: str) -> tuple[float, float, int]:
+    """Return (qty, avg_cost, open_positions_count) for symbol; zeros if unavailable."""
     try:
-        poss = client.get_positions()
-        return len(poss) if isinstance(poss, list) else 0
+        return _positions.position(client, _normalize(symbol))
     except Exception:
-        return 0
+        return 0.0, 0.0, 0
 
 def step(strategy_id: int, client: MoomooClient, symbol: str, params: Dict[str, Any]) -> None:
     # core params
@@ -121,30 +170,30 @@ def step(strategy_id: int, client: MoomooClient, symbol: str, params: Dict[str,
             today = pnl_today().get("realized_pnl", 0.0)
             if float(today) <= -abs(loss_cap):
                 # optional: flatten if holding
-                pos_qty, _ = _current_position(client, symbol)
+                pos_qty, _, _ = _current_position(client, symbol)
                 if pos_qty > 0:
-                    client.place_order(symbol=symbol, qty=pos_qty, side="SELL", order_type="MARKET")
+                    _place(client, symbol=symbol, qty=pos_qty, side="SELL", order_type="MARKET")
                     insert_run(strategy_id, "TRADE", f"[PnL] Loss cap hit; FLATTEN {pos_qty}")
                 insert_run(strategy_id, "SKIP", f"[PnL] Daily loss limit reached (today={today}, cap={loss_cap})")
                 return
 
         # fetch bars via unified provider (futu → yfinance fallback)
-        bars, source = get_bars_safely(client, symbol, ktype, slow + 1)
-        closes = [float(b.get("close", 0) or 0) for b in bars if float(b.get("close", 0) or 0) > 0]
+        closes, source = get_closes_safely(client, symbol, ktype, slow + 1)
+        closes = closes[closes > 0]  # drops zero/missing (NaN) closes
         if len(closes) < slow:
             insert_run(strategy_id, "SKIP", f"Not enough bars from {source}: have {len(closes)}, need {slow}")
             return
 
-        last_price = closes[-1]
+        last_price = float(closes[-1])
         fast_prev = _sma(closes[-(fast + 1):-1])
         slow_prev = _sma(closes[-(slow + 1):-1])
         fast_now = _sma(closes[-fast:])
         slow_now = _sma(closes[-slow:])
 
-        pos_qty, avg_cost = _current_position(client, symbol)
+        pos_qty, avg_cost, open_count = _current_position(client, symbol)
         # flatten-before-close: exit positions even if no cross
         if pos_qty > 0 and in_flatten_window(cfg=cfg):
-            client.place_order(symbol=symbol, qty=pos_qty, side="SELL", order_type="MARKET")
+            _place(client, symbol=symbol, qty=pos_qty, side="SELL", order_type="MARKET")
             insert_run(strategy_id, "TRADE", f"[{source}] FLATTEN SELL {pos_qty} @~{last_price}")
             return
 
@@ -158,16 +207,16 @@ def step(strategy_id: int, client: MoomooClient, symbol: str, params: Dict[str,
         if pos_qty > 0:
             exited = False
             if tp_pct > 0 and last_price >= avg_cost * (1.0 + tp_pct):
-                client.place_order(symbol=symbol, qty=pos_qty, side="SELL", order_type="MARKET")
+                _place(client, symbol=symbol, qty=pos_qty, side="SELL", order_type="MARKET")
                 insert_run(strategy_id, "TRADE", f"[{source}] TP SELL {pos_qty} @~{last_price} (avg {avg_cost}, tp {tp_pct})")
                 exited = True
             elif sl_pct > 0 and last_price <= avg_cost * (1.0 - sl_pct):
-                client.place_order(symbol=symbol, qty=pos_qty, side="SELL", order_type="MARKET")
+                _place(client, symbol=symbol, qty=pos_qty, side="SELL", order_type="MARKET")
                 insert_run(strategy_id, "TRADE", f"[{source}] SL SELL {pos_qty} @~{last_price} (avg {avg_cost}, sl {sl_pct})")
                 exited = True
 
             if not exited and fast_prev >= slow_prev and fast_now < slow_now:
-                client.place_order(symbol=symbol, qty=pos_qty, side="SELL", order_type="MARKET")
+                _place(client, symbol=symbol, qty=pos_qty, side="SELL", order_type="MARKET")
                 insert_run(strategy_id, "TRADE", f"[{source}] CROSS-DOWN SELL {pos_qty} @~{last_price}")
                 exited = True
 
@@ -187,7 +236,6 @@ def step(strategy_id: int, client: MoomooClient, symbol: str, params: Dict[str,
                     insert_run(strategy_id, "SKIP", f"[{source}] Size too small at last={last_price:.4f}")
                     return
 
-            open_count = _open_positions_count(client)
             ok, reason = check_trade_limits(
                 symbol=symbol,
                 side="BUY",
@@ -199,7 +247,7 @@ def step(strategy_id: int, client: MoomooClient, symbol: str, params: Dict[str,
                 insert_run(strategy_id, "SKIP", f"[{source}] Risk blocked entry: {reason}")
                 return
 
-            client.place_order(symbol=symbol, qty=trade_qty, side="BUY", order_type="MARKET")
+            _place(client, symbol=symbol, qty=trade_qty, side="BUY", order_type="MARKET")
             insert_run(strategy_id, "TRADE",
                        f"[{source}] BUY {trade_qty} @~{last_price} (fast {fast_now:.4f} > slow {slow_now:.4f})")
             return
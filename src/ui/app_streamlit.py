@@ -7,11 +7,22 @@ import time
 import json
 import math
 import os
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, time as dtime, timezone
 
+import orjson
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:  # optional; only the diagnostics chart preview needs it
+    import yfinance as yf
+except Exception as _yf_err:
+    yf = None
+    _YF_IMPORT_ERROR = str(_yf_err)
 
 # ---------------------------------------------------------------------
 # Configuration
@@ -26,90 +37,243 @@ UI_SHOW_DIAGNOSTICS   = _flag("UI_SHOW_DIAGNOSTICS", "true")   # legacy Trading/
 UI_ALLOW_MANUAL_ORDERS = _flag("UI_ALLOW_MANUAL_ORDERS", "false")
 UI_SHOW_CHARTS         = _flag("UI_SHOW_CHARTS", "false")
 
+# ---- HTTP: one pooled session for every backend call (keep-alive instead of a new
+# connection per request). Retries cover connection errors and idempotent verbs only;
+# POSTs such as order placement are never replayed.
+@st.cache_resource
+def _http() -> requests.Session:
+    """
+    Pooled requests.Session shared by every backend helper.
+    cache_resource keeps it (and its warm sockets) across reruns and is shared by all
+    browser sessions; that is safe here since only URLs and JSON bodies vary per call.
+    """
+    s = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10, pool_maxsize=20,
+        # 502/503/504 (backend restarting behind a proxy) are retried for idempotent verbs
+        # too; after the last try the error response is returned, not raised
+        max_retries=Retry(total=2, backoff_factor=0.1,
+                          status_forcelist=(502, 503, 504), raise_on_status=False),
+    )
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    s.headers["Accept"] = "application/json"
+    return s
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# (connect, read) seconds: a dead backend fails fast on connect while slow endpoints
+# (backtests, grid search) keep their per-call read timeout
+CONNECT_TIMEOUT = float(os.getenv("UI_CONNECT_TIMEOUT", "1.0"))
+DEFAULT_READ_TIMEOUT = 15.0
+
+def _timeout(read: float = DEFAULT_READ_TIMEOUT) -> tuple[float, float]:
+    return (CONNECT_TIMEOUT, read)
+
+def _api(method: str, path: str, payload=None, timeout: float = DEFAULT_READ_TIMEOUT,
+         check: bool = False, **kwargs):
+    """
+    Backend call on the pooled session; request and response JSON go through orjson.
+    Error bodies are returned as-is for display, unless check=True, which raises
+    requests.HTTPError (with the backend's detail) on a non-2xx status.
+    """
+    kwargs["timeout"] = _timeout(timeout)
+    if payload is not None:
+        kwargs["data"] = orjson.dumps(payload)
+        kwargs["headers"] = _JSON_HEADERS
+    resp = _http().request(method, f"{API_BASE}{path}", **kwargs)
+    if check and not resp.ok:
+        try:
+            detail = orjson.loads(resp.content).get("detail", resp.text)
+        except Exception:
+            detail = resp.text
+        raise requests.HTTPError(f"{resp.status_code} {method} {path}: {detail}", response=resp)
+    return orjson.loads(resp.content)
+
 # ---- Future wiring (stubs now; will connect to backend later) ----
 BOT_MODES = ["assist", "semi", "auto"]  # Autonomy levels
 
 
 # ---------- Backend helpers (kept from original) ----------
+# Server-side defaults of the create/backtest request models (StartMACrossoverRequest,
+# BacktestMARequest, BacktestMAGridRequest in server.py); fields equal to these are left
+# out of those bodies. Not used for risk PUT / strategy PATCH, where an omitted field
+# means "leave unchanged".
+PAYLOAD_DEFAULTS = {
+    "fast": 20, "slow": 50, "ktype": "K_1M", "qty": 1.0,
+    "size_mode": "shares", "dollar_size": 0.0,
+    "stop_loss_pct": 0.0, "take_profit_pct": 0.0,
+    "commission_per_share": 0.0, "slippage_bps": 0.0,
+    "interval_sec": 15, "allow_real": False,
+    "fast_min": 5, "fast_max": 30, "fast_step": 5,
+    "slow_min": 40, "slow_max": 200, "slow_step": 10, "top_n": 10,
+}
+
+def _compact(payload: dict, defaults: dict = PAYLOAD_DEFAULTS) -> dict:
+    return {k: v for k, v in payload.items() if k not in defaults or defaults[k] != v}
+
+# Read-only GETs below are memoized for 2s (repeat clicks skip HTTP); the helpers that
+# change backend state clear the affected caches.
+
+def _clear_trading_reads() -> None:
+    get_positions.clear()
+    get_orders.clear()
+
+def _clear_strategy_reads() -> None:
+    list_strategies.clear()
+    strat_by_id.clear()
+    runs_for_strategy.clear()
+    _drop_prefetched("strategies")
+
 def connect_backend(host, port, client_id):
-    return requests.post(f"{API_BASE}/connect", json={
+    res = _api("POST", "/connect", {
         "host": host, "port": port, "client_id": client_id
-    }, timeout=15).json()
+    }, timeout=15)
+    _clear_trading_reads()
+    session_status.clear()  # connected / active_account changed
+    return res
 
 def select_account(account_id, trd_env):
-    return requests.post(f"{API_BASE}/accounts/select", json={
+    res = _api("POST", "/accounts/select", {
         "account_id": account_id, "trd_env": trd_env
-    }, timeout=15).json()
+    }, timeout=15)
+    _clear_trading_reads()
+    session_status.clear()
+    return res
 
+@st.cache_data(ttl=2.0, show_spinner=False)
 def get_positions():
-    return requests.get(f"{API_BASE}/positions", timeout=15).json()
+    return _api("GET", "/positions", timeout=15)
 
+@st.cache_data(ttl=2.0, show_spinner=False)
 def get_orders():
-    return requests.get(f"{API_BASE}/orders", timeout=15).json()
+    return _api("GET", "/orders", timeout=15)
+
+@st.cache_resource(show_spinner=False)
+def _gather_pool() -> ThreadPoolExecutor:
+    # shared across reruns; matches the HTTP pool so concurrent calls don't queue on sockets
+    return ThreadPoolExecutor(max_workers=4)
+
+def _gather(*fns) -> list:
+    """
+    Run independent backend calls concurrently on the pooled session (wall time is the
+    slowest call, not the sum). Results keep argument order; a failed call's slot holds
+    its exception.
+    """
+    def _safe(fn):
+        try:
+            return fn()
+        except Exception as e:
+            return e
+    pool = _gather_pool()
+    return [f.result() for f in [pool.submit(_safe, fn) for fn in fns]]
+
+def refresh_all():
+    """Fetch positions and orders concurrently; returns (positions, orders) as _gather() does."""
+    return tuple(_gather(get_positions, get_orders))
 
 def place_order(symbol, qty, side, order_type="MARKET", price=None):
     payload = {"symbol": symbol, "qty": qty, "side": side, "order_type": order_type}
     if price is not None:
         payload["price"] = price
-    return requests.post(f"{API_BASE}/orders/place", json=payload, timeout=20).json()
+    res = _api("POST", "/orders/place", payload, timeout=20)
+    _clear_trading_reads()
+    return res
 
 def cancel_order(order_id):
-    return requests.post(f"{API_BASE}/orders/cancel", json={"order_id": order_id}, timeout=15).json()
+    res = _api("POST", "/orders/cancel", {"order_id": order_id}, timeout=15)
+    _clear_trading_reads()
+    return res
 
+@st.cache_data(ttl=10.0, show_spinner=False)
 def risk_get():
-    return requests.get(f"{API_BASE}/risk/config", timeout=15).json()
+    return _api("GET", "/risk/config", timeout=15)
+
+@st.cache_resource(show_spinner=False)
+def _risk_cfg():
+    """Risk config for the Settings widgets, fetched once and kept until risk_put() (or Load) clears it."""
+    return _prefetched("risk", risk_get)
 
 def risk_put(cfg):
-    return requests.put(f"{API_BASE}/risk/config", json=cfg, timeout=20).json()
+    res = _api("PUT", "/risk/config", cfg, timeout=20)
+    risk_get.clear()
+    _risk_cfg.clear()
+    _drop_prefetched("risk")
+    return res
 
 def risk_status():
-    return requests.get(f"{API_BASE}/risk/status", timeout=15).json()
+    return _api("GET", "/risk/status", timeout=15)
 
+@st.cache_data(ttl=2.0, show_spinner=False)
 def list_strategies():
-    return requests.get(f"{API_BASE}/automation/strategies", timeout=15).json()
+    return _api("GET", "/automation/strategies", timeout=15)
 
 def start_ma(payload):
-    return requests.post(f"{API_BASE}/automation/start/ma-crossover", json=payload, timeout=20).json()
+    res = _api("POST", "/automation/start/ma-crossover", _compact(payload), timeout=20)
+    _clear_strategy_reads()
+    return res
 
+@st.cache_data(ttl=2.0, show_spinner=False)
 def strat_by_id(strategy_id: int):
-    return requests.get(f"{API_BASE}/automation/strategies/{strategy_id}", timeout=15).json()
+    return _api("GET", f"/automation/strategies/{strategy_id}", timeout=15)
 
+@st.cache_data(ttl=2.0, show_spinner=False)
 def runs_for_strategy(strategy_id: int, limit: int = 25):
-    return requests.get(f"{API_BASE}/automation/strategies/{strategy_id}/runs?limit={limit}", timeout=15).json()
+    return _api("GET", f"/automation/strategies/{strategy_id}/runs?limit={limit}", timeout=15)
 
 def strat_update(strategy_id: int, payload: dict):
-    return requests.patch(f"{API_BASE}/automation/strategies/{strategy_id}", json=payload, timeout=20).json()
+    res = _api("PATCH", f"/automation/strategies/{strategy_id}", payload, timeout=20)
+    _clear_strategy_reads()
+    return res
 
 def strat_start(strategy_id: int):
-    return requests.post(f"{API_BASE}/automation/start/{strategy_id}", timeout=15).json()
-
-def strat_stop(strategy_id: int):
-    return requests.post(f"{API_BASE}/automation/stop/{strategy_id}", timeout=15).json()
+    res = _api("POST", f"/automation/start/{strategy_id}", timeout=15)
+    _clear_strategy_reads()
+    return res
+
+def strat_stop(strategy_id: int, check: bool = False):
+    res = _api("POST", f"/automation/stop/{strategy_id}", timeout=15, check=check)
+    _clear_strategy_reads()
+    return res
+
+def strat_bulk(ops: list[dict]):
+    """
+    Several strategy ops ({"op": "list"|"get"|"patch"|"start"|"stop"|"runs", "id": ...}) in
+    one call. Raises requests.HTTPError if the call itself fails (e.g. an older backend
+    without the endpoint); per-op failures come back in "results".
+    """
+    res = _api("POST", "/automation/strategies/bulk", {"actions": ops}, timeout=30, check=True)
+    _clear_strategy_reads()
+    return res
 
 def bt_ma(payload):
-    return requests.post(f"{API_BASE}/backtest/ma-crossover", json=payload, timeout=60).json()
+    return _api("POST", "/backtest/ma-crossover", _compact(payload), timeout=60)
 
 def bt_grid(payload):
-    return requests.post(f"{API_BASE}/backtest/ma-grid", json=payload, timeout=120).json()
+    return _api("POST", "/backtest/ma-grid", _compact(payload), timeout=120)
 
+@st.cache_data(ttl=10.0, show_spinner=False)
 def session_status():
-    return requests.get(f"{API_BASE}/session/status", timeout=15).json()
+    return _api("GET", "/session/status", timeout=15)
 
 def session_save(host, port, account_id, trd_env):
-    return requests.post(f"{API_BASE}/session/save", json={
+    res = _api("POST", "/session/save", {
         "host": host, "port": port, "account_id": account_id, "trd_env": trd_env
-    }, timeout=15).json()
+    }, timeout=15)
+    session_status.clear()
+    return res
 
 def session_clear():
-    return requests.post(f"{API_BASE}/session/clear", timeout=15).json()
+    res = _api("POST", "/session/clear", timeout=15)
+    session_status.clear()
+    return res
 
 
 # ---------- NEW: backend helpers for new endpoints ----------
 def bot_mode_get():
-    return requests.get(f"{API_BASE}/bot/mode", timeout=10).json()
+    return _api("GET", "/bot/mode", timeout=10)
 
 def bot_mode_put(mode: str):
-    return requests.put(f"{API_BASE}/bot/mode", json={"mode": mode}, timeout=10).json()
+    return _api("PUT", "/bot/mode", {"mode": mode}, timeout=10)
 
 def action_logs(limit: int = 100, symbol: str | None = None, since_hours: int | None = None):
     params = {"limit": limit}
@@ -117,13 +281,74 @@ def action_logs(limit: int = 100, symbol: str | None = None, since_hours: int |
         params["symbol"] = symbol
     if since_hours:
         params["since_hours"] = since_hours
-    return requests.get(f"{API_BASE}/logs/actions", params=params, timeout=15).json()
+    return _api("GET", "/logs/actions", params=params, timeout=15)
 
 def flatten_all(symbols: list[str] | None = None):
     payload = {}
     if symbols:
         payload["symbols"] = symbols
-    return requests.post(f"{API_BASE}/positions/flatten", json=payload, timeout=30).json()
+    res = _api("POST", "/positions/flatten", payload, timeout=30)
+    _clear_trading_reads()
+    return res
+
+
+def _debounced(key: str, fn, cooldown: float = 0.5):
+    """
+    Call fn() at most once per `cooldown` seconds for this browser session and key; a
+    repeat inside the window (double click, widget-triggered rerun) reuses the last result.
+    Put the call's arguments in `key`.
+    """
+    now = time.monotonic()
+    ts_key, val_key = f"{key}_last_ts", f"{key}_last_val"
+    if val_key in st.session_state and now - st.session_state.get(ts_key, 0.0) < cooldown:
+        return st.session_state[val_key]
+    val = fn()
+    st.session_state[val_key] = val
+    st.session_state[ts_key] = now
+    return val
+
+
+# ---------- Startup prefetch ----------
+# What the user is likely to need first (strategy list, risk config) is fetched in the
+# background with one /automation/ui-state call when a browser session opens, so it
+# overlaps with rendering; each field is used at most once.
+_PREFETCH_FIELDS = {"strategies": "strategies", "risk": "risk_config"}
+_PREFETCH_MAX_AGE = 30.0  # seconds; older results are refetched instead
+
+def load_ui_state(strategy_id: int | None = None):
+    params = {"strategy_id": strategy_id} if strategy_id is not None else None
+    return _api("GET", "/automation/ui-state", params=params, timeout=15)
+
+@st.cache_resource(show_spinner=False)
+def _prefetch_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=1)
+
+def _start_prefetch() -> None:
+    if "prefetch" in st.session_state:
+        return
+    st.session_state["prefetch"] = {
+        "at": time.monotonic(),
+        "future": _prefetch_pool().submit(load_ui_state),
+        "pending": set(_PREFETCH_FIELDS),
+    }
+
+def _prefetched(name: str, fn):
+    """Field `name` of the background ui-state prefetch if still fresh, else fn()."""
+    pf = st.session_state.get("prefetch")
+    if pf and name in pf["pending"]:
+        pf["pending"].discard(name)
+        if time.monotonic() - pf["at"] < _PREFETCH_MAX_AGE:
+            try:
+                return pf["future"].result()[_PREFETCH_FIELDS[name]]
+            except Exception:
+                pass  # failed prefetch; fall through to a normal call
+    return fn()
+
+def _drop_prefetched(name: str) -> None:
+    """Discard an unused prefetched field after a mutation, so the next read is fresh."""
+    pf = st.session_state.get("prefetch")
+    if pf:
+        pf["pending"].discard(name)
 
 
 # ---------- Latest price with broker→yfinance fallback (kept) ----------
@@ -131,19 +356,20 @@ def latest_price(symbol: str) -> tuple[float | None, str]:
     """Return (price, source). Tries broker /quotes/{symbol}, falls back to yfinance."""
     # try broker first
     try:
-        r = requests.get(f"{API_BASE}/quotes/{symbol}", timeout=10)
+        r = _http().get(f"{API_BASE}/quotes/{symbol}", timeout=_timeout(10))
         if r.ok:
-            j = r.json()
+            j = orjson.loads(r.content)
             for k in ("last", "last_price", "price", "close"):
                 if k in j and j[k] not in (None, "", 0):
                     return float(j[k]), "broker"
     except Exception:
         pass
-    # fallback to yfinance
+    # fallback to yfinance (same 60s download cache as the chart preview)
+    if yf is None:
+        return None, "n/a"
     try:
-        import yfinance as yf
         yf_sym = symbol.split(".")[-1] if "." in symbol else symbol
-        df = yf.download(yf_sym, period="1d", interval="1m", progress=False, threads=False)
+        df = _yf_download(yf_sym, "1d", "1m")
         if df is not None and not df.empty:
             return float(df["Close"].dropna().iloc[-1]), "yfinance"
     except Exception:
@@ -173,12 +399,15 @@ def market_open_now(cfg: dict) -> bool:
     except Exception:
         return True  # UI hint only
 
+@st.cache_data(ttl=60, show_spinner=False)
+def _yf_download(symbol: str, period: str, interval: str):
+    # repeat chart loads within a minute reuse the same bars instead of re-querying Yahoo
+    return yf.download(symbol, period=period, interval=interval, auto_adjust=True, progress=False)
+
 def _yf_fetch_close(symbol: str, interval: str, rows: int):
     """Return (DataFrame with Close + index, error_str)."""
-    try:
-        import yfinance as yf
-    except Exception as e:
-        return None, f"yfinance not installed: {e}"
+    if yf is None:
+        return None, f"yfinance not installed: {_YF_IMPORT_ERROR}"
 
     i_map = {"1m":"1m","5m":"5m","15m":"15m","30m":"30m","1h":"60m","1d":"1d"}
     yf_int = i_map.get(interval, "1m")
@@ -186,7 +415,7 @@ def _yf_fetch_close(symbol: str, interval: str, rows: int):
     period = p_map.get(yf_int, "7d")
 
     try:
-        df = yf.download(symbol, period=period, interval=yf_int, auto_adjust=True, progress=False)
+        df = _yf_download(symbol, period, yf_int)
     except Exception as e:
         return None, f"yfinance download failed: {e}"
     if df is None or df.empty:
@@ -210,12 +439,26 @@ def _yf_fetch_close(symbol: str, interval: str, rows: int):
     return out, None
 
 
+def _chart_mas(close: pd.Series, fast: int, slow: int):
+    """Fast/slow SMAs from one shared cumulative sum (same values as rolling(w, min_periods=1).mean())."""
+    csum = np.cumsum(close.to_numpy(dtype=np.float64))
+    counts = np.arange(1, len(csum) + 1, dtype=np.float64)
+
+    def _sma(w: int) -> pd.Series:
+        tot = csum.copy()
+        tot[w:] -= csum[:-w]
+        return pd.Series(tot / np.minimum(counts, w), index=close.index)
+
+    return _sma(max(1, int(fast))), _sma(max(1, int(slow)))
+
+
 # ---------------------------------------------------------------------
 # Main app (RESTRUCTURE)
 # ---------------------------------------------------------------------
 def main():
     st.set_page_config(page_title="Moomoo ChatGPT Trading Bot", layout="wide")
     st.title("Moomoo ChatGPT Trading Bot")
+    _start_prefetch()
 
     # ----- Sidebar: Backend Connection (kept) -----
     st.sidebar.header("Backend Connection")
@@ -261,9 +504,18 @@ def main():
 
     # ----- Top status bar (compact) -----
     col_a, col_b, col_c, col_d = st.columns([1, 1, 1, 1.2], gap="small")
+    def _active_account():
+        resp = _http().get(f"{API_BASE}/accounts/active", timeout=_timeout(2))
+        return orjson.loads(resp.content) if resp.ok else {}
+
+    # three independent round trips; each metric falls back to "—" on its own
+    acct_json, rstat, pnl_today = _gather(
+        _active_account, risk_status, lambda: _api("GET", "/pnl/today", timeout=3),
+    )
+
     try:
-        acct_resp = requests.get(f"{API_BASE}/accounts/active", timeout=2)
-        acct_json = acct_resp.json() if acct_resp.ok else {}
+        if isinstance(acct_json, Exception):
+            raise acct_json
         with col_a:
             st.metric("Account", acct_json.get("account_id", "—"))
             st.caption(acct_json.get("trd_env", ""))
@@ -272,7 +524,8 @@ def main():
             st.metric("Account", "—")
 
     try:
-        rstat = risk_status()
+        if isinstance(rstat, Exception):
+            raise rstat
         cfg = rstat.get("config", {}) if isinstance(rstat, dict) else {}
         with col_b:
             st.metric("Risk", "ENABLED" if cfg.get("enabled") else "OFF")
@@ -288,7 +541,8 @@ def main():
 
     try:
         # PnL today (already exposed by backend)
-        pnl_today = requests.get(f"{API_BASE}/pnl/today", timeout=3).json()
+        if isinstance(pnl_today, Exception):
+            raise pnl_today
         with col_d:
             st.metric("Realized PnL (Today)", f"{pnl_today.get('realized_pnl','—')}")
     except Exception:
@@ -337,13 +591,16 @@ def main():
 
         # --- Risk config (kept; central to bot) ---
         st.subheader("Risk Configuration")
-        cfg_view = {}
         cols = st.columns([1,1,1])
         with cols[0]:
             if st.button("Load Risk Config", key="btn_risk_load"):
-                cfg_view = risk_get()
-                st.session_state["risk_cfg"] = cfg_view
-        cfg_view = st.session_state.get("risk_cfg", cfg_view or {})
+                risk_get.clear()  # force a fresh GET
+                _risk_cfg.clear()
+        try:
+            cfg_view = _risk_cfg()
+        except Exception as e:
+            st.warning(f"Risk config unavailable: {e}")
+            cfg_view = {}
 
         if isinstance(cfg_view, dict) and cfg_view:
             trow = st.columns(3)
@@ -376,7 +633,7 @@ def main():
                 "flatten_before_close_min": int(r_flat_min),
             }
             try:
-                st.session_state["risk_cfg"] = risk_put(payload)
+                risk_put(payload)  # also drops the cached config
                 st.success("Risk config saved.")
             except Exception as e:
                 st.error(f"Save failed: {e}")
@@ -385,18 +642,21 @@ def main():
 
         # --- Strategy defaults (MA crossover) ---
         st.subheader("Strategy: MA Crossover (defaults)")
-        sc1, sc2, sc3, sc4 = st.columns([1,1,1,1])
-        with sc1:
-            s_symbol = st.text_input("Default Symbol", "US.AAPL", key="ma_symbol")
-        with sc2:
-            s_fast = st.number_input("Fast MA", value=20, min_value=1, step=1, key="ma_fast")
-        with sc3:
-            s_slow = st.number_input("Slow MA", value=50, min_value=2, step=1, key="ma_slow")
-        with sc4:
-            s_interval = st.number_input("Interval (sec)", value=15, min_value=1, step=1, key="ma_interval")
-        s_allow_real = st.checkbox("Allow Real Trading (strategy-level)", value=False, key="ma_allow_real")
-
-        if st.button("Start MA Strategy", key="btn_start_ma_strategy"):
+        # a form commits all inputs in one rerun on submit instead of one per edit
+        with st.form("ma_start"):
+            sc1, sc2, sc3, sc4 = st.columns([1,1,1,1])
+            with sc1:
+                s_symbol = st.text_input("Default Symbol", "US.AAPL", key="ma_symbol")
+            with sc2:
+                s_fast = st.number_input("Fast MA", value=20, min_value=1, step=1, key="ma_fast")
+            with sc3:
+                s_slow = st.number_input("Slow MA", value=50, min_value=2, step=1, key="ma_slow")
+            with sc4:
+                s_interval = st.number_input("Interval (sec)", value=15, min_value=1, step=1, key="ma_interval")
+            s_allow_real = st.checkbox("Allow Real Trading (strategy-level)", value=False, key="ma_allow_real")
+            start_ma_clicked = st.form_submit_button("Start MA Strategy")
+
+        if start_ma_clicked:
             payload = {
                 "symbol": s_symbol, "fast": int(s_fast), "slow": int(s_slow),
                 "ktype": "K_1M",
@@ -409,21 +669,32 @@ def main():
             c1, c2 = st.columns(2)
             with c1:
                 if st.button("List Strategies", key="btn_list_strat"):
-                    st.session_state["strategies"] = list_strategies()
-                st.json(st.session_state.get("strategies", []))
+                    st.session_state["strategies"] = _prefetched("strategies", list_strategies)
+                strat_box = st.empty()
+                strat_box.json(st.session_state.get("strategies", []))
             with c2:
-                strat_id_in = st.text_input("Strategy ID", "", key="strat_id_in")
-                cc1, cc2, cc3 = st.columns(3)
-                with cc1:
-                    if st.button("Start", key="btn_start_id") and strat_id_in.strip():
-                        st.json(strat_start(int(strat_id_in)))
-                with cc2:
-                    if st.button("Stop", key="btn_stop_id") and strat_id_in.strip():
-                        st.json(strat_stop(int(strat_id_in)))
-                with cc3:
+                with st.form("strat_ops"):
+                    strat_id_in = st.text_input("Strategy ID", "", key="strat_id_in")
+                    strat_op = st.radio("Op", ["Start", "Stop", "Recent Runs"], horizontal=True, key="strat_op")
                     limit = st.number_input("Runs rows", value=20, step=5, key="runs_limit")
-                    if st.button("Recent Runs", key="btn_runs") and strat_id_in.strip():
-                        st.json(runs_for_strategy(int(strat_id_in), int(limit)))
+                    strat_go = st.form_submit_button("Go")
+                if strat_go and strat_id_in.strip():
+                    sid = int(strat_id_in)
+                    if strat_op == "Start":
+                        st.json(strat_start(sid))
+                    elif strat_op == "Stop":
+                        st.json(strat_stop(sid))
+                    else:
+                        # runs plus a fresh strategy list (shown on the left) in one wait
+                        n = int(limit)
+                        strategies, runs = _debounced(
+                            f"btn_runs:{sid}:{n}",
+                            lambda: _gather(list_strategies, lambda: runs_for_strategy(sid, n)),
+                        )
+                        if not isinstance(strategies, Exception):
+                            st.session_state["strategies"] = strategies
+                            strat_box.json(strategies)
+                        st.json(str(runs) if isinstance(runs, Exception) else runs)
 
     # ===== Bot Status =====
     with tabs[1]:
@@ -446,7 +717,7 @@ def main():
                 st.metric("Open Positions", "—")
         with colC:
             try:
-                pnl_today = requests.get(f"{API_BASE}/pnl/today", timeout=3).json()
+                pnl_today = _api("GET", "/pnl/today", timeout=3)
                 st.metric("Realized PnL (Today)", f"{pnl_today.get('realized_pnl','—')}")
             except Exception:
                 st.metric("Realized PnL (Today)", "—")
@@ -459,13 +730,35 @@ def main():
         with cc1:
             if st.button("Kill Switch (Stop Strategies)", help="Stops all active strategies"):
                 try:
-                    lst = list_strategies() or []
-                    stopped = []
-                    for s in lst:
-                        if s.get("active"):
-                            strat_stop(int(s["id"]))
-                            stopped.append(s["id"])
-                    st.success(f"Stopped strategies: {stopped}" if stopped else "No active strategies.")
+                    list_strategies.clear()  # never act on a cached list here
+                    lst = list_strategies()
+                    if not isinstance(lst, list):
+                        raise RuntimeError(f"could not list strategies: {lst}")
+                    active = [int(s["id"]) for s in lst if s.get("active")]
+                    stopped, failed = [], []
+                    if active:
+                        try:
+                            results = strat_bulk([{"op": "stop", "id": sid} for sid in active])["results"]
+                        except Exception as e:
+                            st.warning(f"Bulk stop failed ({e}); stopping one at a time.")
+                            results = []
+                            for sid in active:
+                                try:
+                                    results.append({"result": strat_stop(sid, check=True)})
+                                except Exception as e1:
+                                    results.append({"error": str(e1)})
+                        for i, sid in enumerate(active):
+                            r = results[i] if i < len(results) else {"error": "no result returned"}
+                            if "result" in r:
+                                stopped.append(sid)
+                            else:
+                                failed.append(f"{sid} ({r.get('error')})")
+                    if failed:
+                        st.error(f"NOT stopped: {', '.join(failed)}")
+                    if stopped:
+                        st.success(f"Stopped strategies: {stopped}")
+                    elif not active:
+                        st.success("No active strategies.")
                 except Exception as e:
                     st.error(f"Kill switch failed: {e}")
         with cc2:
@@ -505,9 +798,10 @@ def main():
 
         since_hours = {"4h":4, "8h":8, "24h":24, "48h":48, "7d":168}[f_since]
         try:
-            logs = action_logs(limit=int(f_limit),
-                               symbol=(f_symbol.strip() or None),
-                               since_hours=int(since_hours))
+            log_args = dict(limit=int(f_limit), symbol=(f_symbol.strip() or None),
+                            since_hours=int(since_hours))
+            # refetched on every rerun of the page, so collapse bursts of reruns
+            logs = _debounced(f"logs:{sorted(log_args.items())}", lambda: action_logs(**log_args))
             if isinstance(logs, list) and logs:
                 df = pd.DataFrame(logs)
                 # pretty order columns if present
@@ -567,7 +861,14 @@ def main():
                     "qty": float(gs_qty), "top_n": int(gs_top_n),
                 }
                 st.session_state["grid_results"] = bt_grid(payload)
-                st.json(st.session_state.get("grid_results", {}))
+            grid_res = st.session_state.get("grid_results")
+            if grid_res is not None:
+                rows = grid_res.get("results") if isinstance(grid_res, dict) else None
+                if isinstance(rows, list):
+                    # Arrow-backed table; only visible rows are sent to the browser
+                    st.dataframe(pd.DataFrame(rows).head(int(gs_top_n)), use_container_width=True)
+                if not isinstance(rows, list) or st.checkbox("Show raw JSON", key="gs_raw_json"):
+                    st.json(grid_res)  # errors (e.g. {"detail": ...}) always show raw
 
     # ===== Diagnostics =====
     if UI_SHOW_DIAGNOSTICS:
@@ -576,13 +877,15 @@ def main():
 
             # --- Dashboard-like quick checks ---
             with st.expander("Overview", expanded=False):
-                c1, c2 = st.columns(2)
-                with c1:
-                    if st.button("Refresh Positions", key="btn_dash_positions"):
-                        st.json(get_positions())
-                with c2:
-                    if st.button("Refresh Orders", key="btn_dash_orders"):
-                        st.json(get_orders())
+                if st.button("Refresh All", key="btn_dash_refresh_all"):
+                    _clear_trading_reads()  # explicit refresh bypasses the 2s read cache
+                    c1, c2 = st.columns(2)
+                    for col, res in zip((c1, c2), refresh_all()):
+                        with col:
+                            if isinstance(res, Exception):
+                                st.error(str(res))
+                            else:
+                                st.json(res)
 
             # --- Trading (manual order ticket) ---
             if UI_ALLOW_MANUAL_ORDERS:
@@ -651,11 +954,10 @@ def main():
 
             # --- Positions table  ---
             st.markdown("**Positions**")
-            _raw_pos = None
-            try:
-                _raw_pos = get_positions()
-            except Exception as e:
-                st.error(f"Positions error: {e}")
+            # both tables' data in one concurrent round trip
+            _raw_pos, _raw_orders = refresh_all()
+            if isinstance(_raw_pos, Exception):
+                st.error(f"Positions error: {_raw_pos}")
                 _raw_pos = []
 
             pos: list[dict] = []
@@ -704,11 +1006,8 @@ def main():
 
             # --- Orders table ---
             st.markdown("**Orders**")
-            _raw_orders = None
-            try:
-                _raw_orders = get_orders()
-            except Exception as e:
-                st.error(f"Orders error: {e}")
+            if isinstance(_raw_orders, Exception):
+                st.error(f"Orders error: {_raw_orders}")
                 _raw_orders = []
 
             orders: list[dict] = []
@@ -763,8 +1062,7 @@ def main():
                                     f"Not enough rows ({len(df)}) for slow MA={mini_slow}. "
                                     f"Increase Rows or lower MA windows."
                                 )
-                            df["fast"] = df["Close"].rolling(window=int(mini_fast), min_periods=1).mean()
-                            df["slow"] = df["Close"].rolling(window=int(mini_slow), min_periods=1).mean()
+                            df["fast"], df["slow"] = _chart_mas(df["Close"], mini_fast, mini_slow)
                             st.line_chart(df[["Close", "fast", "slow"]])
 
             # --- Session ---
@@ -0,0 +1,81 @@
+"""
+Plain-Python MA-crossover loop as it was before the numba kernel (one SMA per window,
+summed sequentially). Parity tests compare the engine against it.
+"""
+import math
+
+from backtest.engine import Bar
+
+
+def random_walk_bars(n=1500, seed=7, start=100.0, vol=0.01):
+    import random
+    rnd = random.Random(seed)
+    bars, px = [], start
+    for i in range(n):
+        o = px
+        px *= 1.0 + rnd.gauss(0.0, vol)
+        bars.append(Bar(f"t{i:05d}", o, max(o, px), min(o, px), px, float(rnd.randint(0, 1000))))
+    return bars
+
+
+def seq_mean(closes, lo, hi):
+    seq = closes[max(0, lo):hi]
+    return sum(seq) / len(seq) if seq else 0.0
+
+
+def prefix_mean_fn(closes):
+    csum, total = [0.0], 0.0
+    for c in closes:
+        total += c
+        csum.append(total)
+
+    def mean(_closes, lo, hi):
+        lo = max(0, lo)
+        return (csum[hi] - csum[lo]) / (hi - lo) if hi > lo else 0.0
+    return mean
+
+
+def reference_ma_crossover(bars, fast, slow, qty=1.0, size_mode="shares", dollar_size=0.0,
+                           stop_loss_pct=0.0, take_profit_pct=0.0, commission_per_share=0.0,
+                           slippage_bps=0.0, mean=seq_mean):
+    """Returns (trades as (entry_ts, exit_ts, entry_px, exit_px, qty, pnl), max_drawdown)."""
+    closes = [b.c for b in bars]
+    slip = 1.0 + slippage_bps / 1e4
+    pos_qty = avg_cost = entry_px = 0.0
+    entry_ts = ""
+    trades = []
+    equity = peak = max_dd = 0.0
+    for i in range(1, len(bars)):
+        fast_prev = mean(closes, i - fast - 1, i)
+        slow_prev = mean(closes, i - slow - 1, i)
+        fast_now = mean(closes, i - fast + 1, i + 1)
+        slow_now = mean(closes, i - slow + 1, i + 1)
+        has_next = i + 1 < len(bars)
+        next_ts = bars[i + 1].ts if has_next else bars[i].ts
+        next_open = bars[i + 1].o if has_next else bars[i].c
+        if pos_qty > 0 and (
+            (take_profit_pct > 0 and bars[i].c >= avg_cost * (1.0 + take_profit_pct))
+            or (stop_loss_pct > 0 and bars[i].c <= avg_cost * (1.0 - stop_loss_pct))
+            or (fast_prev >= slow_prev and fast_now < slow_now)
+        ):
+            exit_px = next_open * slip
+            pnl = (exit_px - avg_cost) * pos_qty - commission_per_share * pos_qty
+            trades.append((entry_ts, next_ts, entry_px, exit_px, pos_qty, pnl))
+            equity += pnl
+            pos_qty = avg_cost = entry_px = 0.0
+            entry_ts = ""
+        if pos_qty == 0 and fast_prev <= slow_prev and fast_now > slow_now:
+            fill_px = next_open * slip
+            q = qty
+            if size_mode == "usd" and dollar_size > 0 and fill_px > 0:
+                q = math.floor(dollar_size / fill_px)
+            if q >= 1 or not (size_mode == "usd" and dollar_size > 0 and fill_px > 0):
+                pos_qty, avg_cost, entry_ts, entry_px = q, fill_px, next_ts, fill_px
+                equity -= commission_per_share * pos_qty
+        peak = max(peak, equity)
+        max_dd = min(max_dd, equity - peak)
+    if pos_qty > 0:
+        exit_px = bars[-1].c * slip
+        pnl = (exit_px - avg_cost) * pos_qty - commission_per_share * pos_qty
+        trades.append((entry_ts or bars[-1].ts, bars[-1].ts, entry_px or avg_cost, exit_px, pos_qty, pnl))
+    return trades, max_dd
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# modules import each other as top-level packages (core, risk, backtest, ...), as when run from src/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
@@ -0,0 +1,118 @@
+from backtest.engine import Bar, run_ma_crossover
+
+
+def _bars(closes):
+    return [Bar(f"2024-01-01 09:{i:02d}:00", c, c, c, c, 0.0) for i, c in enumerate(closes)]
+
+
+# flat, dip, then a rally: one cross-up entry, closed out on the last bar
+CLOSES = [10.0] * 6 + [8.0, 8.0, 12.0, 14.0, 16.0, 18.0]
+
+
+def test_usd_mode_without_dollar_size_keeps_fractional_qty():
+    res = run_ma_crossover(_bars(CLOSES), fast=2, slow=4, qty=1.5, size_mode="usd", dollar_size=0.0)
+    assert res.trades
+    for t in res.trades:
+        assert t.qty == 1.5
+        assert abs(t.pnl - (t.exit_px - t.entry_px) * t.qty) < 1e-9
+
+
+def test_usd_mode_with_dollar_size_floors_to_whole_shares():
+    res = run_ma_crossover(_bars(CLOSES), fast=2, slow=4, qty=1.5, size_mode="usd", dollar_size=100.0)
+    assert res.trades
+    for t in res.trades:
+        assert isinstance(t.qty, int) and t.qty == int(100.0 // t.entry_px)
+
+
+# ---- parity with the pre-numba loop ----
+
+import csv
+import os
+
+import pytest
+
+from backtest import engine
+from _reference import prefix_mean_fn, random_walk_bars, reference_ma_crossover
+
+PARAMS = [
+    dict(fast=5, slow=20),
+    dict(fast=3, slow=12, stop_loss_pct=0.01, take_profit_pct=0.02),
+    dict(fast=8, slow=30, size_mode="usd", dollar_size=1000.0, commission_per_share=0.01,
+         slippage_bps=5.0),
+    dict(fast=2, slow=5, qty=2.5, slippage_bps=3.0, stop_loss_pct=0.005),
+]
+
+
+def _assert_matches(res, ref_trades, ref_dd):
+    got = [(t.entry_ts, t.exit_ts, t.entry_px, t.exit_px, t.qty, t.pnl) for t in res.trades]
+    assert [g[:2] + (g[4],) for g in got] == [r[:2] + (r[4],) for r in ref_trades]
+    for g, r in zip(got, ref_trades):
+        assert g[2:4] + (g[5],) == pytest.approx(r[2:4] + (r[5],), rel=1e-12, abs=1e-9)
+    wins = sum(1 for r in ref_trades if r[5] >= 0)
+    m = res.metrics
+    assert (m["trades"], m["wins"], m["losses"]) == (len(ref_trades), wins, len(ref_trades) - wins)
+    assert m["gross_pnl"] == pytest.approx(sum(r[5] for r in ref_trades), abs=1e-9)
+    assert m["max_drawdown"] == pytest.approx(ref_dd, abs=1e-9)
+
+
+@pytest.mark.parametrize("kw", PARAMS)
+def test_run_ma_crossover_matches_reference_loop(kw):
+    bars = random_walk_bars()
+    ref_trades, ref_dd = reference_ma_crossover(bars, **kw)
+    assert ref_trades  # the walk must actually trade for this to mean anything
+    _assert_matches(engine.run_ma_crossover(bars, **kw), ref_trades, ref_dd)
+
+
+# Exact fast/slow ties (flat runs) are decided by the last ulp of the window means. The
+# engine takes them from prefix sums (chunk12-1), so it matches a loop that uses the same
+# prefix-sum means exactly, ties included.
+
+def _flat_bars(closes):
+    return [engine.Bar(f"t{i:05d}", c, c, c, c, 0.0) for i, c in enumerate(closes)]
+
+
+def test_flat_series_with_exact_sums_never_trades():
+    assert engine.run_ma_crossover(_flat_bars([10.0] * 300), fast=3, slow=7).trades == []
+
+
+@pytest.mark.parametrize("px", [0.1, 33.33, 101.37])
+def test_flat_run_ties_follow_prefix_sum_means(px):
+    closes = [round(c.c, 2) for c in random_walk_bars(n=60, seed=3)] + [px] * 120
+    closes += [round(c.c, 2) for c in random_walk_bars(n=60, seed=4)]
+    bars = _flat_bars(closes)
+    ref_trades, ref_dd = reference_ma_crossover(bars, 3, 7, mean=prefix_mean_fn(closes))
+    _assert_matches(engine.run_ma_crossover(bars, fast=3, slow=7), ref_trades, ref_dd)
+
+
+# ---- load_bars_csv against csv.DictReader, CSV and .npz paths ----
+
+def _dictreader_bars(path):
+    out = []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            out.append(engine.Bar(str(row["time"]), float(row["open"]), float(row["high"]),
+                                  float(row["low"]), float(row["close"]),
+                                  float(row.get("volume", 0) or 0)))
+    out.sort(key=lambda b: b.ts)
+    return out
+
+
+def test_load_bars_csv_matches_dictreader_and_npz_reload(tmp_path, monkeypatch):
+    bars = random_walk_bars(n=500, seed=11)
+    path = tmp_path / "ABC_K_1M.csv"
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["time", "open", "high", "low", "close", "volume"])
+        for i, b in enumerate(reversed(bars)):  # out of order on disk
+            w.writerow([b.ts, repr(b.o), repr(b.h), repr(b.l), repr(b.c), "" if i % 50 == 0 else b.v])
+    monkeypatch.setattr(engine, "BAR_DIR", str(tmp_path))
+    engine._load_bars.cache_clear()
+
+    expected = _dictreader_bars(path)
+    assert list(engine.load_bars_csv("US.ABC", "K_1M")) == expected
+    assert os.path.exists(tmp_path / "ABC_K_1M.npz")
+
+    engine._load_bars.cache_clear()  # next load comes from the .npz sibling
+    reloaded = engine.load_bars_csv("ABC", "K_1M")
+    assert list(reloaded) == expected
+    assert reloaded.closes.tolist() == [b.c for b in expected]
@@ -0,0 +1,30 @@
+import pytest
+
+from backtest.engine import BarList, run_ma_crossover
+from backtest.grid import run_ma_grid
+from _reference import random_walk_bars
+
+KW = dict(qty=1.0, size_mode="usd", dollar_size=1000.0, stop_loss_pct=0.01,
+          take_profit_pct=0.03, commission_per_share=0.01, slippage_bps=3.0)
+
+
+def _per_pair(bars, fasts, slows):
+    rows = []
+    for f in fasts:  # grid order: fast-major
+        for s in slows:
+            if s > f:
+                m = run_ma_crossover(bars, f, s, **KW).metrics
+                rows.append({"fast": f, "slow": s, **m})
+    # gross_pnl desc, then win_rate desc; stable, so ties keep grid order
+    return sorted(rows, key=lambda r: (-r["gross_pnl"], -r["win_rate"]))
+
+
+@pytest.mark.parametrize("top_n", [5, 1000])
+def test_grid_ranking_matches_per_pair_backtests(top_n):
+    bars = BarList(random_walk_bars(n=800, seed=5))
+    got = run_ma_grid(bars, 2, 12, 2, 10, 40, 5, top_n=top_n, **KW)
+    want = _per_pair(bars, range(2, 13, 2), range(10, 41, 5))[:top_n]
+    assert [(g["fast"], g["slow"]) for g in got] == [(w["fast"], w["slow"]) for w in want]
+    for g, w in zip(got, want):
+        for k in ("trades", "wins", "losses", "win_rate", "gross_pnl", "avg_pnl", "max_drawdown"):
+            assert g[k] == pytest.approx(w[k], abs=1e-9), k